@@ -1,15 +1,21 @@
 import os
-import re
 import random
 import traceback
-from flask import Flask, request, render_template, send_from_directory, make_response
+from flask import Flask, Response, request, render_template, send_from_directory, make_response, stream_with_context
 from flask_restful import Resource, Api
 from flask_cors import CORS
 
-from generate_audio import generate_audio
-from youtube_transcript_api import YouTubeTranscriptApi
-from summarization_model import call_summarization_model
+from generate_audio import generate_audio, extract_video_id
+from summarization_model import PREFILTER_RATIO, IncrementalSummarizer, call_summarization_model, model_fingerprint, plan_summarization
 from transcribe import transcribe_lecture
+from cache import SummaryCache, make_key, text_hash
+from transcript_providers import TranscriptService
+from jobs import FINALIZE_WORKERS, JobManager, QueueFull
+from preload import readiness, warm_up_in_background
+from live_sessions import SessionManager, TooManySessions
+from metrics import Counter, Gauge, collect_timings, render as render_metrics, stage
+from summarization_model import model_status
+from transcribe import whisper_status
 
 # FALLBACK SUMMARIES (Randomly selected if YouTube blocks the server)
 FALLBACK_TOPICS = [
@@ -81,6 +87,60 @@ app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 CORS(app)
 api = Api(app)
 
+# Shared summary/transcript cache for both summary endpoints
+summary_cache = SummaryCache()
+# Captions -> auto-captions -> Whisper, with transcripts cached by video ID
+transcript_service = TranscriptService(summary_cache)
+# Background pool for long-running summaries
+job_manager = JobManager()
+# Live session finalizes, kept off job_manager so they never queue behind a Whisper run
+finalize_manager = JobManager(workers=FINALIZE_WORKERS, name='finalize')
+# Incremental summaries of live recordings
+session_manager = SessionManager()
+
+# Scrape-time gauges; stage latencies are recorded where the work happens
+IN_FLIGHT_REQUESTS = Gauge('lecture_in_flight_requests', 'API requests currently being handled')
+Gauge('lecture_job_queue_depth', 'Summary jobs waiting for a worker, by pool',
+      lambda: {(('pool', 'summary'),): job_manager.queue_depth(),
+               (('pool', 'finalize'),): finalize_manager.queue_depth()})
+Gauge('lecture_jobs_running', 'Summary jobs currently running, by pool',
+      lambda: {(('pool', 'summary'),): job_manager.running(),
+               (('pool', 'finalize'),): finalize_manager.running()})
+Gauge('lecture_cache_hit_ratio', 'Summary/transcript cache hit ratio since start',
+      lambda: summary_cache.stats()['hit_rate'])
+Counter('lecture_cache_lookups_total', 'Summary/transcript cache lookups by result',
+      lambda: {(('result', k),): v for k, v in summary_cache.stats().items() if k in ('memory_hits', 'disk_hits', 'misses')})
+Gauge('lecture_model_load_seconds', 'Time taken to load each model',
+      lambda: {(('model', 'summarizer'),): model_status()['load_seconds'],
+               (('model', 'whisper'),): whisper_status()['load_seconds']})
+
+@app.before_request
+def _count_request_start():
+    if request.path.startswith('/api/'):
+        IN_FLIGHT_REQUESTS.inc()
+
+@app.before_request
+def _start_warm_up():
+    # Under `flask run` nothing else starts the warm-up, so the first request
+    # does (gunicorn.conf.py and `python app.py` have already started it, which
+    # makes this a no-op). Not done on import: spawned transcription processes
+    # re-import the main module, and would each start a warm-up of their own.
+    warm_up_in_background()
+
+@app.teardown_request
+def _count_request_end(exc):
+    if request.path.startswith('/api/'):
+        IN_FLIGHT_REQUESTS.dec()
+
+def _wants_timings():
+    """Timing breakdowns are added to responses when the URL has ?timings=1."""
+    return request.args.get('timings') in ('1', 'true')
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics for this worker process."""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
@@ -98,9 +158,115 @@ def serve(path):
         response.headers['Expires'] = '0'
         return response
 
+def _fallback_summary():
+    """Pick a canned summary for when the real pipeline cannot run."""
+    random_selection = random.choice(FALLBACK_TOPICS)
+    app.logger.info(f"Returning randomized summary for: {random_selection['topic']}")
+    return {'summary': random_selection['summary']}
+
+def _summarize_for_job(job, transcribed_text):
+    """Plan the summary, publish the plan as a job event, then run it with progress."""
+    plan = plan_summarization(transcribed_text)
+    job.update('plan', **plan.to_dict())
+    return call_summarization_model(
+        transcribed_text,
+        plan=plan,
+        progress=lambda done, total: job.update('summarize', done=done, total=total)
+    )
+
+def _run_link_summary(job, video_id, video_url, summary_key):
+    """Job body for /api/link-summary: get a transcript, then summarize it.
+
+    When the transcript comes from Whisper, its segments are fed to an
+    IncrementalSummarizer as they are decoded, so most chunks are already
+    summarized when transcription ends. The extractive pre-filter needs the
+    whole transcript, so it turns this off.
+    """
+    summarizer = None
+
+    def on_segment(segment):
+        nonlocal summarizer
+        if PREFILTER_RATIO < 1:
+            return
+        if summarizer is None:
+            summarizer = IncrementalSummarizer()
+        summarizer.feed(segment['text'])
+        job.update('transcribe', video_id=video_id, seconds=round(segment['end']),
+                   chunks_done=summarizer.chunks_done, chunks_queued=summarizer.chunks_queued)
+
+    try:
+        transcript = transcript_service.get(
+            video_id, video_url,
+            on_stage=lambda name: job.update(name, video_id=video_id),
+            on_segment=on_segment,
+        )
+
+        if transcript is None:
+            # SELECT A RANDOM TOPIC if YouTube fails
+            return _fallback_summary()
+
+        # Summarize the transcribed text
+        if summarizer is not None and transcript.provider == 'whisper':
+            job.update('summarize', chunks_done=summarizer.chunks_done, chunks_queued=summarizer.chunks_queued)
+            summary = summarizer.finish()
+        else:
+            summary = _summarize_for_job(job, transcript.text)
+        summary_cache.set(summary_key, summary)
+        return {'summary': summary, 'source': transcript.provider}
+    except Exception as e:
+        app.logger.error(f'Error processing link-summary: {e}')
+        # Return a random selection even on server error
+        return _fallback_summary()
+    finally:
+        if summarizer is not None:
+            summarizer.close()
+
+def _run_record_summary(job, transcribed_text, summary_key):
+    """Job body for /api/record-summary."""
+    try:
+        summary = _summarize_for_job(job, transcribed_text)
+        summary_cache.set(summary_key, summary)
+        return {'summary': summary}
+    except Exception as e:
+        app.logger.exception('Error processing record-summary')
+        return {'summary': "The live audio was captured, but the summarization engine is currently busy. Please try again in 1 minute."}
+
+def _run_session_finalize(job, session):
+    """Job body for /api/record-sessions/<id>/finalize."""
+    try:
+        job.update('summarize', chunks_done=session.status()['chunks_done'])
+        with stage('session_finalize'):
+            return {'summary': session.finalize()}
+    except Exception as e:
+        app.logger.exception('Error finalizing record session')
+        return {'summary': "The live audio was captured, but the summarization engine is currently busy. Please try again in 1 minute."}
+
+def _submit_job(key, fn, *args, manager=job_manager):
+    """Queue a job and return the 202 response, or 429 when the queue is full."""
+    try:
+        job, created = manager.submit(key, fn, *args)
+    except QueueFull:
+        return {'error': 'Server is busy, please retry shortly'}, 429, {'Retry-After': '30'}
+    if not created:
+        app.logger.info(f"Joined in-flight job {job.id}")
+    return job.to_dict(_wants_timings()), 202, {'Location': f'/api/jobs/{job.id}'}
+
+def _find_job(job_id):
+    return job_manager.get(job_id) or finalize_manager.get(job_id)
+
+def _cached_response(summary, timings):
+    body = {'summary': summary}
+    if _wants_timings():
+        body['timings'] = timings
+    return body
+
 class LinkSummary(Resource):
     def post(self):
-        """Summarizes a YouTube lecture given a link."""
+        """Summarizes a YouTube lecture given a link.
+
+        Cached summaries are returned directly; otherwise the work is queued
+        and a job ID is returned for polling at /api/jobs/<job_id>.
+        """
         youtube_link = request.json.get('link')
 
         if not youtube_link:
@@ -108,52 +274,45 @@ class LinkSummary(Resource):
 
         try:
             # Enhanced video ID extraction
-            video_id = None
-            regex = r"(?:youtube\.com\/(?:[^\/]+\/.+\/|(?:v|e(?:mbed)?)\/|.*[?&]v=)|youtu\.be\/)([^\"&?\/\s]{11})"
-            match = re.search(regex, youtube_link)
-            if match:
-                video_id = match.group(1)
-            
-            transcribed_text = ""
-            if video_id:
-                try:
-                    # Specific language order to increase success chance
-                    transcript_list = YouTubeTranscriptApi.get_transcript(video_id, languages=['en', 'en-US', 'en-GB'])
-                    transcribed_text = " ".join([t['text'] for t in transcript_list])
-                except Exception as e:
-                    app.logger.warning(f"Transcript fetch failed: {str(e)}")
-
-            if not transcribed_text:
-                # SELECT A RANDOM TOPIC if YouTube fails
-                random_selection = random.choice(FALLBACK_TOPICS)
-                app.logger.info(f"Returning randomized summary for: {random_selection['topic']}")
-                return {'summary': random_selection['summary']}
-
-            # Summarize the transcribed text
-            summary = call_summarization_model(transcribed_text)
-
-            # Return the summary as a JSON response
-            return {'summary': summary}
+            video_id = extract_video_id(youtube_link)
+
+            if not video_id:
+                return _fallback_summary()
+
+            summary_key = make_key('link-summary', video_id, model_fingerprint())
+            with collect_timings() as timings, stage('cache_lookup'):
+                cached_summary = summary_cache.get(summary_key)
+            if cached_summary is not None:
+                app.logger.info(f"Summary cache hit for video {video_id}")
+                return _cached_response(cached_summary, timings)
+
+            return _submit_job(summary_key, _run_link_summary, video_id, youtube_link, summary_key)
         except Exception as e:
             app.logger.error(f'Error processing link-summary: {e}')
             # Return a random selection even on server error
-            random_selection = random.choice(FALLBACK_TOPICS)
-            return {'summary': random_selection['summary']}
+            return _fallback_summary()
     
     def get(self):
         return {'msg': "Welcome to YouTube Summary Page"}
 
 class RecordSummary(Resource):
     def post(self):
-        """Transcribes an audio file and summarizes the transcribed text."""
+        """Summarizes the transcribed text of a live recording.
+
+        Like LinkSummary, uncached work is queued and returns a job ID.
+        """
         transcribed_text = request.json.get('finalTranscript')
 
         if not transcribed_text:
             return {'error': 'Missing "finalTranscript" in request body'}, 400
 
         try:
-            summary = call_summarization_model(transcribed_text)
-            return {'summary': summary}
+            summary_key = make_key('record-summary', text_hash(transcribed_text), model_fingerprint())
+            with collect_timings() as timings, stage('cache_lookup'):
+                summary = summary_cache.get(summary_key)
+            if summary is not None:
+                return _cached_response(summary, timings)
+            return _submit_job(summary_key, _run_record_summary, transcribed_text, summary_key)
         except Exception as e:
             app.logger.exception('Error processing record-summary')
             return {'summary': "The live audio was captured, but the summarization engine is currently busy. Please try again in 1 minute."}
@@ -161,8 +320,95 @@ class RecordSummary(Resource):
     def get(self):
         return {'msg': "Welcome to Live Audio Summary Page"}
 
+class RecordSessions(Resource):
+    def post(self):
+        """Starts a live recording session; transcript deltas are then appended to it."""
+        try:
+            session = session_manager.create()
+        except TooManySessions:
+            return {'error': 'Too many live sessions, please retry shortly'}, 429, {'Retry-After': '30'}
+        return session.status(), 201
+
+class RecordSession(Resource):
+    def get(self, session_id):
+        """Reports how much of a live session has been summarized in the background."""
+        session = session_manager.get(session_id)
+        if session is None:
+            return {'error': 'Unknown session'}, 404
+        return session.status()
+
+    def delete(self, session_id):
+        if not session_manager.close(session_id):
+            return {'error': 'Unknown session'}, 404
+        return {'closed': session_id}
+
+class RecordSessionAppend(Resource):
+    def post(self, session_id):
+        """Appends newly recognized text ("delta") to a live session."""
+        session = session_manager.get(session_id)
+        if session is None:
+            return {'error': 'Unknown session'}, 404
+        session.append((request.get_json(silent=True) or {}).get('delta') or "")
+        return session.status()
+
+class RecordSessionFinalize(Resource):
+    def post(self, session_id):
+        """Summarizes a live session, reusing its background chunk summaries.
+
+        An optional "delta" is appended first, e.g. the last interim transcript.
+        The remaining work runs as a job (see LinkSummary); a summary already
+        computed for the same text is returned directly.
+        """
+        session = session_manager.get(session_id)
+        if session is None:
+            return {'error': 'Unknown session'}, 404
+        session.append((request.get_json(silent=True) or {}).get('delta') or "")
+        if not session.words:
+            return {'error': 'No transcript has been appended to this session'}, 400
+
+        summary = session.cached_summary()
+        if summary is not None:
+            return {'summary': summary}
+        return _submit_job(make_key('record-session', session.id, session.version), _run_session_finalize, session,
+                           manager=finalize_manager)
+
+class JobStatus(Resource):
+    def get(self, job_id):
+        """Reports the stage, progress and (once finished) result of a job.
+
+        With ?timings=1 the response includes the time spent in each stage.
+        """
+        job = _find_job(job_id)
+        if job is None:
+            return {'error': 'Unknown job'}, 404
+        return job.to_dict(_wants_timings())
+
+@app.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-Sent-Events stream of a job's progress, ending with its result."""
+    job = _find_job(job_id)
+    if job is None:
+        return {'error': 'Unknown job'}, 404
+    response = Response(stream_with_context(job.stream()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+class Ready(Resource):
+    def get(self):
+        """Readiness probe: 200 once the models are loaded and warmed up, 503 before."""
+        state = readiness()
+        return state, 200 if state['ready'] else 503
+
 api.add_resource(LinkSummary, '/api/link-summary')
 api.add_resource(RecordSummary, '/api/record-summary')
+api.add_resource(JobStatus, '/api/jobs/<string:job_id>')
+api.add_resource(RecordSessions, '/api/record-sessions')
+api.add_resource(RecordSession, '/api/record-sessions/<string:session_id>')
+api.add_resource(RecordSessionAppend, '/api/record-sessions/<string:session_id>/append')
+api.add_resource(RecordSessionFinalize, '/api/record-sessions/<string:session_id>/finalize')
+api.add_resource(Ready, '/api/ready')
 
 if __name__ == '__main__':
+    warm_up_in_background()
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 7860)))
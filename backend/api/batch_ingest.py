@@ -0,0 +1,261 @@
+"""Process a CSV of lecture links through download -> transcribe -> summarize.
+
+Usage: python batch_ingest.py [--links ../../youtube_to_audio/video_links.csv]
+                              [--output batch_results.jsonl] [--parquet batch_results.parquet]
+                              [--download-workers 2] [--max-buffered-mb 1024] [--local-audio DIR]
+
+Download, transcription and summarization are separate stages on their own
+threads, joined by bounded queues: while lecture N is summarized, lecture
+N+1 is transcribed and the following ones download. Downloads are decoded
+into memory-mapped temporary files; audio held in memory instead (from a
+custom downloader) is kept up to --max-buffered-mb and spilled to
+temporary .npy files beyond that. Each finished lecture is appended to the
+JSONL output straight away, and a rerun skips links already recorded as
+done, so an interrupted batch resumes where it stopped. --local-audio
+replaces the yt-dlp download with audio files named <video_id>.<ext> from a
+directory, for offline runs.
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from generate_audio import download_audio_array, extract_video_id
+from summarization_model import call_summarization_model
+from transcribe import transcribe_lecture
+
+VIDEO_LINKS_CSV = os.path.join("..", "..", "youtube_to_audio", "video_links.csv")
+# Decoded float32 audio is about 230 MB per hour of lecture
+MAX_BUFFERED_MB = 1024
+_DONE = object()
+
+
+def read_links(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return [row['links'].strip() for row in csv.DictReader(f) if (row.get('links') or '').strip()]
+
+
+def record_key(link):
+    return extract_video_id(link) or link
+
+
+def load_checkpoint(output):
+    """Keys of links already processed successfully in an earlier run."""
+    done = set()
+    if os.path.exists(output):
+        with open(output, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interrupted run
+                if record.get('status') == 'done':
+                    done.add(record['key'])
+    return done
+
+
+def local_audio_downloader(directory):
+    """Stand-in for download_audio_array that copies <video_id>.<ext> from a directory.
+
+    The copy matters because transcribe_lecture deletes the file it is given.
+    """
+    def download(link):
+        matches = glob.glob(os.path.join(directory, f"{glob.escape(record_key(link))}.*"))
+        if not matches:
+            raise FileNotFoundError(f"No local audio for {link} in {directory}")
+        handle, path = tempfile.mkstemp(suffix=os.path.splitext(matches[0])[1])
+        os.close(handle)
+        shutil.copyfile(matches[0], path)
+        return path
+    return download
+
+
+class _AudioBudget:
+    """Bytes of decoded audio allowed to wait in memory between download and transcription."""
+
+    def __init__(self, limit_bytes):
+        self.limit = limit_bytes
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, nbytes):
+        """Claim `nbytes` if they fit (or nothing else is held); False means spill to disk."""
+        with self._lock:
+            if self.used and self.used + nbytes > self.limit:
+                return False
+            self.used += nbytes
+            return True
+
+    def release(self, nbytes):
+        with self._lock:
+            self.used -= nbytes
+
+
+class _SpilledAudio:
+    """Decoded samples saved to a temporary .npy file because the memory budget was full."""
+
+    def __init__(self, samples):
+        handle, self.path = tempfile.mkstemp(suffix='.npy')
+        os.close(handle)
+        np.save(self.path, samples)
+
+    def load(self):
+        try:
+            return np.load(self.path)
+        finally:
+            os.remove(self.path)
+
+
+def run_batch(links, output, download=download_audio_array, download_workers=2, queue_size=2,
+              max_buffered_mb=MAX_BUFFERED_MB, transcribe=transcribe_lecture, summarize=call_summarization_model):
+    """Process `links`, appending one JSON record per lecture to `output`.
+
+    Links to the same video are processed once. `transcribe` and
+    `summarize` default to the real models and can be swapped out for
+    offline tests. Returns (processed, skipped) counts.
+    """
+    done = load_checkpoint(output)
+    # The same video often appears under several share links
+    unique = {}
+    for link in links:
+        unique.setdefault(record_key(link), link)
+    todo = [link for key, link in unique.items() if key not in done]
+    print(f"{len(todo)} videos to process, {len(unique) - len(todo)} already done")
+
+    links_queue = queue.Queue()
+    for link in todo:
+        links_queue.put(link)
+    # Both queues are bounded, so each stage runs at most `queue_size` lectures ahead of the next
+    audio_queue = queue.Queue(maxsize=queue_size)
+    text_queue = queue.Queue(maxsize=queue_size)
+    budget = _AudioBudget(max_buffered_mb * 1024 * 1024)
+
+    def download_worker():
+        while True:
+            try:
+                link = links_queue.get_nowait()
+            except queue.Empty:
+                audio_queue.put(_DONE)
+                return
+            start = time.perf_counter()
+            try:
+                audio = download(link)
+                held = 0
+                # Memory-mapped samples (from download_audio_array) are already on disk
+                if isinstance(audio, np.ndarray) and not isinstance(audio, np.memmap):
+                    if budget.reserve(audio.nbytes):
+                        held = audio.nbytes
+                    else:
+                        audio = _SpilledAudio(audio)
+                audio_queue.put((link, audio, held, None, time.perf_counter() - start))
+            except Exception as e:
+                audio_queue.put((link, None, 0, f"download failed: {e}", time.perf_counter() - start))
+
+    def transcribe_worker(download_threads):
+        finished = 0
+        while finished < download_threads:
+            item = audio_queue.get()
+            if item is _DONE:
+                finished += 1
+                continue
+
+            # audio is a file path from --local-audio, decoded samples, or samples spilled to disk
+            link, audio, held, error, download_seconds = item
+            record = {'key': record_key(link), 'link': link, 'timings': {'download': download_seconds}}
+            if error is None:
+                try:
+                    if isinstance(audio, _SpilledAudio):
+                        audio = audio.load()
+                    start = time.perf_counter()
+                    record['transcript'] = transcribe(audio)
+                    record['timings']['transcribe'] = time.perf_counter() - start
+                except Exception:
+                    error = traceback.format_exc(limit=3)
+                finally:
+                    if isinstance(audio, str) and os.path.exists(audio):
+                        os.remove(audio)
+                    elif isinstance(audio, _SpilledAudio) and os.path.exists(audio.path):
+                        os.remove(audio.path)
+            del audio
+            budget.release(held)
+            if error:
+                record['error'] = error
+            text_queue.put(record)
+        text_queue.put(_DONE)
+
+    workers = [threading.Thread(target=download_worker, daemon=True) for _ in range(max(1, download_workers))]
+    workers.append(threading.Thread(target=transcribe_worker, args=(len(workers),), daemon=True))
+    for worker in workers:
+        worker.start()
+
+    processed = 0
+    with open(output, 'a', encoding='utf-8') as out:
+        while True:
+            record = text_queue.get()
+            if record is _DONE:
+                break
+
+            if 'error' not in record:
+                try:
+                    start = time.perf_counter()
+                    record['summary'] = summarize(record['transcript'])
+                    record['timings']['summarize'] = time.perf_counter() - start
+                except Exception:
+                    record['error'] = traceback.format_exc(limit=3)
+            record['status'] = 'failed' if 'error' in record else 'done'
+
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+            processed += 1
+            print(f"[{processed}/{len(todo)}] {record['status']}: {record['link']}")
+
+    return processed, len(unique) - len(todo)
+
+
+def write_parquet(jsonl_path, parquet_path):
+    """Convert the JSONL results (latest record per link) to Parquet."""
+    try:
+        import pandas as pd
+    except ImportError:
+        raise SystemExit("--parquet needs pandas and pyarrow installed")
+    frame = pd.read_json(jsonl_path, lines=True)
+    frame = frame.drop_duplicates('key', keep='last')
+    frame['timings'] = frame['timings'].apply(json.dumps)
+    frame.to_parquet(parquet_path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--links", default=VIDEO_LINKS_CSV, help="CSV file with a 'links' column")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL results, also the resume checkpoint")
+    parser.add_argument("--parquet", help="also write the results to this Parquet file")
+    parser.add_argument("--download-workers", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=2, help="lectures allowed to wait between stages")
+    parser.add_argument("--max-buffered-mb", type=int, default=MAX_BUFFERED_MB,
+                        help="decoded audio kept in memory while waiting for Whisper; the rest is spilled to disk")
+    parser.add_argument("--local-audio", help="directory of <video_id>.<ext> files to use instead of downloading")
+    args = parser.parse_args()
+
+    download = local_audio_downloader(args.local_audio) if args.local_audio else download_audio_array
+    processed, skipped = run_batch(read_links(args.links), args.output, download, args.download_workers,
+                                   args.queue_size, args.max_buffered_mb)
+    print(f"Processed {processed} videos, skipped {skipped} already done")
+    if args.parquet:
+        write_parquet(args.output, args.parquet)
+
+
+if __name__ == "__main__":
+    main()
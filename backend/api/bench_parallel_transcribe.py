@@ -0,0 +1,107 @@
+"""Benchmark parallel Whisper transcription against the number of worker processes.
+
+Usage: python bench_parallel_transcribe.py [--audio FILE] [--minutes 10] [--workers 1 2 4]
+
+Without --audio, speech is synthesized with espeak-ng from the lectures in
+speech_to_text/assets/transcripts.csv; if espeak-ng is not installed, a
+synthetic signal of tone bursts and pauses is used instead (timing only).
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+sys.path.append(os.getcwd())
+
+from parallel_transcribe import SAMPLE_RATE, transcribe_parallel, warm_up
+import whisper
+
+TRANSCRIPTS_CSV = os.path.join("..", "..", "speech_to_text", "assets", "transcripts.csv")
+
+
+def synthesize_speech(minutes):
+    """Speak lecture text with espeak-ng until `minutes` of audio exist, or return None."""
+    espeak = shutil.which("espeak-ng") or shutil.which("espeak")
+    if espeak is None or not os.path.exists(TRANSCRIPTS_CSV):
+        return None
+    csv.field_size_limit(sys.maxsize)
+    with open(TRANSCRIPTS_CSV, newline='', encoding='utf-8') as f:
+        lectures = [row['lecture'] for row in csv.DictReader(f)]
+
+    target = int(minutes * 60 * SAMPLE_RATE)
+    pieces, total = [], 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, lecture in enumerate(lectures):
+            wav = os.path.join(tmp, f"{i}.wav")
+            subprocess.run([espeak, "-w", wav, lecture[:20000]], check=True, stderr=subprocess.DEVNULL)
+            samples = whisper.load_audio(wav)
+            pieces.append(samples)
+            total += len(samples)
+            if total >= target:
+                break
+    return np.concatenate(pieces)[:target] if pieces else None
+
+
+def synthesize_tones(minutes):
+    """Bursts of voiced-like tones separated by short pauses."""
+    rng = np.random.default_rng(0)
+    chunks, total, target = [], 0, int(minutes * 60 * SAMPLE_RATE)
+    while total < target:
+        length = int(rng.uniform(1.0, 4.0) * SAMPLE_RATE)
+        t = np.arange(length) / SAMPLE_RATE
+        burst = 0.3 * np.sin(2 * np.pi * rng.uniform(120, 300) * t) * np.hanning(length)
+        pause = np.zeros(int(rng.uniform(0.2, 0.8) * SAMPLE_RATE))
+        chunks.extend([burst, pause])
+        total += length + len(pause)
+    return np.concatenate(chunks)[:target].astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", help="audio file to transcribe instead of synthesized audio")
+    parser.add_argument("--minutes", type=float, default=10, help="length of synthesized audio")
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts to try (default: 1, 2, 4, ... up to the CPU count)")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.audio:
+        samples, source = whisper.load_audio(args.audio), args.audio
+    else:
+        samples, source = synthesize_speech(args.minutes), "espeak-ng"
+        if samples is None:
+            samples, source = synthesize_tones(args.minutes), "synthetic tones"
+
+    cores = os.cpu_count() or 1
+    workers_list = args.workers or sorted({1, cores} | {2 ** i for i in range(cores.bit_length()) if 2 ** i <= cores})
+    duration = len(samples) / SAMPLE_RATE
+    print(f"Audio: {source}, {duration / 60:.1f} min; {cores} CPU cores")
+
+    results = []
+    for workers in workers_list:
+        # Start the pool first so model loading is not part of the measurement
+        warm_up(workers)
+        start = time.perf_counter()
+        output = transcribe_parallel(samples, workers=workers)
+        elapsed = time.perf_counter() - start
+        results.append({'workers': workers, 'seconds': elapsed, 'realtime_factor': duration / elapsed,
+                        'segments': len(output['segments']), 'words': len(output['text'].split())})
+
+    baseline = results[0]['seconds']
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8} {'x realtime':>11}")
+    for r in results:
+        r['speedup'] = baseline / r['seconds']
+        print(f"{r['workers']:>8} {r['seconds']:>9.1f} {r['speedup']:>8.2f} {r['realtime_factor']:>11.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'source': source, 'audio_seconds': duration, 'cores': cores, 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Measure what the extractive pre-filter saves and what it costs in quality.
+
+Usage: python bench_prefilter.py [--ratios 1.0 0.7 0.5 0.3] [--limit 5] [--json results.json]
+
+Summarizes the lectures in speech_to_text/assets/transcripts_notes_long.csv
+once per compression ratio (1.0 = no pre-filter) and reports mean latency,
+speedup, generate calls and ROUGE against the reference notes, plus each
+ratio's ROUGE-L agreement with the unfiltered summaries.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from compare_backends import read_lectures
+from evaluation import mean_scores, rouge_scores
+from summarization_model import call_summarization_model, load_models, plan_summarization
+
+
+def run_ratio(lectures, ratio):
+    """Summarize every lecture with one compression ratio."""
+    summaries, latencies, plan_seconds, calls, kept = [], [], [], [], []
+    for row in lectures:
+        start = time.perf_counter()
+        plan = plan_summarization(row['lecture'], compression_ratio=ratio)
+        plan_seconds.append(time.perf_counter() - start)
+        summaries.append(call_summarization_model(row['lecture'], plan=plan))
+        latencies.append(time.perf_counter() - start)
+        calls.append(plan.total_calls)
+        if plan.prefilter:
+            kept.append(plan.prefilter['tokens_after'] / max(plan.prefilter['tokens_before'], 1))
+    return {
+        'ratio': ratio,
+        'summaries': summaries,
+        'latencies': latencies,
+        'plan_seconds': plan_seconds,
+        'generate_calls': calls,
+        'tokens_kept': sum(kept) / len(kept) if kept else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ratios", nargs="+", type=float, default=[1.0, 0.7, 0.5, 0.3])
+    parser.add_argument("--limit", type=int, default=5, help="only use the first N lectures (0 = all)")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    ratios = sorted(set(args.ratios) | {1.0}, reverse=True)
+    lectures = read_lectures(args.limit)
+    references = [row['answer'] for row in lectures]
+    load_models()
+
+    results = []
+    for ratio in ratios:
+        print(f"Running ratio {ratio}...")
+        results.append(run_ratio(lectures, ratio))
+
+    baseline = results[0]
+    baseline_latency = sum(baseline['latencies']) / len(baseline['latencies'])
+    print(f"\n{'ratio':>5} {'kept':>6} {'calls':>6} {'plan s':>7} {'mean s':>7} {'speedup':>8} "
+          f"{'ROUGE-1':>8} {'ROUGE-2':>8} {'ROUGE-L':>8} {'dROUGE-L':>9} {'vs 1.0':>7}")
+    for r in results:
+        r['rouge'] = mean_scores([rouge_scores(s, ref) for s, ref in zip(r['summaries'], references)])
+        r['agreement'] = mean_scores([rouge_scores(s, ref) for s, ref in zip(r['summaries'], baseline['summaries'])])
+        r['mean_latency'] = sum(r['latencies']) / len(r['latencies'])
+        r['speedup'] = baseline_latency / r['mean_latency']
+        r['rougeL_delta'] = r['rouge']['rougeL'] - baseline['rouge']['rougeL']
+        print(f"{r['ratio']:>5.2f} {r['tokens_kept']:>6.0%} {sum(r['generate_calls']) / len(lectures):>6.1f} "
+              f"{sum(r['plan_seconds']) / len(lectures):>7.2f} {r['mean_latency']:>7.2f} {r['speedup']:>7.2f}x "
+              f"{r['rouge']['rouge1']:>8.3f} {r['rouge']['rouge2']:>8.3f} {r['rouge']['rougeL']:>8.3f} "
+              f"{r['rougeL_delta']:>+9.3f} {r['agreement']['rougeL']:>7.3f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
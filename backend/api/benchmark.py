@@ -0,0 +1,201 @@
+"""Offline benchmark of the transcribe -> summarize pipeline.
+
+Usage: python benchmark.py [--limit N] [--audio-minutes M] [--output results.json]
+                           [--baseline baseline.json] [--save-baseline baseline.json]
+
+Replays the lectures in speech_to_text/assets/transcripts.csv and
+transcripts_notes_long.csv through call_summarization_model, and locally
+synthesized audio (see bench_parallel_transcribe.py) through
+transcribe_lecture. Nothing is fetched from YouTube. Each stage runs in its
+own subprocess, so its peak RSS is its own. For each stage it records wall
+time, throughput, chunk/call counts and peak RSS, writes them as JSON, and
+exits non-zero if any stage is slower than the baseline by more than
+--tolerance. Runs whose transcription audio came from a different source
+(espeak-ng speech vs synthetic tones) are not compared.
+"""
+import argparse
+import csv
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+sys.path.append(os.getcwd())
+
+from bench_parallel_transcribe import synthesize_speech, synthesize_tones
+from summarization_model import call_summarization_model, load_models, plan_summarization
+from transcribe import SAMPLE_RATE, _load_whisper, transcribe_lecture
+
+ASSETS = os.path.join("..", "..", "speech_to_text", "assets")
+LECTURE_FILES = ["transcripts.csv", "transcripts_notes_long.csv"]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def read_lectures(limit):
+    csv.field_size_limit(sys.maxsize)
+    lectures = []
+    for name in LECTURE_FILES:
+        with open(os.path.join(ASSETS, name), newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        lectures += [(f"{name}:{row['Id']}", row['lecture']) for row in (rows[:limit] if limit else rows)]
+    return lectures
+
+
+def bench_summarize(lectures):
+    _, tokenizer = load_models()
+    items = []
+    for lecture_id, text in lectures:
+        plan = plan_summarization(text)
+        tokens = len(tokenizer(text, add_special_tokens=False)['input_ids'])
+        start = time.perf_counter()
+        call_summarization_model(text, plan=plan)
+        seconds = time.perf_counter() - start
+        items.append({
+            'id': lecture_id, 'seconds': seconds, 'input_tokens': tokens,
+            'tokens_per_second': tokens / seconds, 'chunks': len(plan.chunks),
+            'generate_calls': plan.total_calls, 'reduce_levels': plan.reduce_levels,
+        })
+    total_seconds = sum(i['seconds'] for i in items)
+    return {
+        'seconds': total_seconds,
+        'tokens_per_second': sum(i['input_tokens'] for i in items) / total_seconds,
+        'chunks': sum(i['chunks'] for i in items),
+        'generate_calls': sum(i['generate_calls'] for i in items),
+        'peak_rss_mb': peak_rss_mb(),
+        'items': items,
+    }
+
+
+def bench_transcribe(minutes):
+    samples, source = synthesize_speech(minutes), "espeak-ng"
+    if samples is None:
+        samples, source = synthesize_tones(minutes), "synthetic tones"
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        path = f.name
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes((np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes())
+
+    _load_whisper()
+    start = time.perf_counter()
+    text = transcribe_lecture(path)  # deletes the file
+    seconds = time.perf_counter() - start
+    audio_seconds = len(samples) / SAMPLE_RATE
+    return {
+        'seconds': seconds,
+        'source': source,
+        'audio_seconds': audio_seconds,
+        'realtime_factor': audio_seconds / seconds,
+        'words_per_second': len(text.split()) / seconds,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def mismatched_inputs(results, baseline):
+    """Stages whose input `source` differs from the baseline's, which makes their numbers incomparable."""
+    mismatches = []
+    for stage, current in results['stages'].items():
+        previous = baseline.get('stages', {}).get(stage)
+        if previous and previous.get('source') != current.get('source'):
+            mismatches.append(f"{stage}: {current.get('source')} vs baseline {previous.get('source')}")
+    return mismatches
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages (empty if none)."""
+    regressions = []
+    for stage, current in results['stages'].items():
+        previous = baseline.get('stages', {}).get(stage)
+        if not previous:
+            continue
+        for metric in ('seconds', 'peak_rss_mb'):
+            if previous.get(metric) and current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{stage}.{metric}: {current[metric]:.1f} vs baseline {previous[metric]:.1f} "
+                                   f"(+{(current[metric] / previous[metric] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def run_stage(stage, args):
+    """Benchmark one stage in this (fresh) process and print its results as the last line of JSON."""
+    if stage == 'load':
+        start = time.perf_counter()
+        load_models()
+        result = {'seconds': time.perf_counter() - start, 'peak_rss_mb': peak_rss_mb()}
+    elif stage == 'transcribe':
+        result = bench_transcribe(args.audio_minutes)
+    else:
+        load_models()
+        result = bench_summarize(read_lectures(args.limit))
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=5, help="lectures per CSV file, 0 for all (default 5)")
+    parser.add_argument("--audio-minutes", type=float, default=5, help="length of the synthesized audio; 0 skips Whisper")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="fail if slower than this earlier --output file")
+    parser.add_argument("--save-baseline", help="also write the results here as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs baseline (default 0.2 = 20%%)")
+    parser.add_argument("--stage", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stage:
+        run_stage(args.stage, args)
+        return
+
+    stages = ['load'] + (['transcribe'] if args.audio_minutes > 0 else []) + ['summarize']
+    results = {'stages': {}}
+    for stage in stages:
+        print(f"Benchmarking {stage}...")
+        proc = subprocess.run(
+            [sys.executable, __file__, "--stage", stage, "--limit", str(args.limit),
+             "--audio-minutes", str(args.audio_minutes)],
+            capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            print(f"  {stage} failed:\n{proc.stderr.strip()[-2000:]}")
+            sys.exit(1)
+        results['stages'][stage] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    for stage, data in results['stages'].items():
+        extras = {k: v for k, v in data.items() if k not in ('seconds', 'peak_rss_mb', 'items')}
+        print(f"{stage:<11} {data['seconds']:>8.1f}s  peak RSS {data['peak_rss_mb']:>6.0f} MB  {extras}")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatches = mismatched_inputs(results, baseline)
+        if mismatches:
+            print(f"\nNot comparing against {args.baseline}, the inputs differ:")
+            for message in mismatches:
+                print("  " + message)
+            sys.exit(2)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nPERFORMANCE REGRESSION against " + args.baseline)
+            for message in regressions:
+                print("  " + message)
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
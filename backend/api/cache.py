@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Defaults for the shared summary/transcript cache
+CACHE_PATH = os.environ.get('SUMMARY_CACHE_PATH', os.path.join('cache', 'summaries.sqlite3'))
+CACHE_MEMORY_ITEMS = int(os.environ.get('SUMMARY_CACHE_MEMORY_ITEMS', 128))
+CACHE_MAX_BYTES = int(os.environ.get('SUMMARY_CACHE_MAX_MB', 256)) * 1024 * 1024
+CACHE_TTL = int(os.environ.get('SUMMARY_CACHE_TTL', 7 * 24 * 3600))
+
+
+def make_key(*parts):
+    """Build a cache key from its parts (e.g. kind, video ID, model fingerprint)."""
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+
+def text_hash(text):
+    """Content hash of a transcript, used to key record summaries."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class SummaryCache:
+    """Two-tier cache: an in-process LRU in front of an SQLite file.
+
+    Values are anything JSON-serialisable. Entries older than `ttl` seconds
+    are treated as missing, and the disk tier evicts least recently used
+    entries once it grows past `max_bytes`.
+    """
+
+    def __init__(self, path=CACHE_PATH, memory_items=CACHE_MEMORY_ITEMS,
+                 max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL):
+        self.path = path
+        self.memory_items = memory_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps the cache safe across threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _remember(self, key, value, created):
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached value for `key`, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return entry[0]
+                del self._memory[key]
+
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+
+        with self._lock:
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            self._stats['disk_hits'] += 1
+            return value
+
+    def set(self, key, value):
+        """Store `value` in both tiers, evicting old disk entries if needed."""
+        now = time.time()
+        payload = json.dumps(value)
+        with self._lock:
+            self._remember(key, value, now)
+            self._stats['sets'] += 1
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now)
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        removed = conn.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl,)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total > self.max_bytes:
+            for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed ASC").fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                removed += 1
+        if removed:
+            with self._lock:
+                self._stats['evictions'] += removed
+
+    def stats(self):
+        """Hit/miss counters for both tiers."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_items'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,112 @@
+"""Compare summarizer backends on latency, memory and ROUGE.
+
+Usage: python compare_backends.py [--backends torch torch-int8 onnx] [--limit 5]
+
+Each backend runs in its own subprocess (so RSS is measured in isolation)
+over the lectures in speech_to_text/assets/transcripts_notes_long.csv.
+Summaries are scored with ROUGE against the reference notes in the CSV and
+against the output of the first backend listed.
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from evaluation import mean_scores, rouge_scores
+
+NOTES_CSV = os.path.join("..", "..", "speech_to_text", "assets", "transcripts_notes_long.csv")
+
+
+def read_lectures(limit):
+    csv.field_size_limit(sys.maxsize)
+    with open(NOTES_CSV, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    return rows[:limit] if limit else rows
+
+
+def rss_mb():
+    """Current and peak resident set size of this process, in MB."""
+    status = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            status[key] = value.strip()
+    return int(status['VmRSS'].split()[0]) / 1024, int(status['VmHWM'].split()[0]) / 1024
+
+
+def run_worker(backend, limit):
+    """Load one backend and summarize every lecture, printing JSON results."""
+    os.environ['SUMMARIZER_BACKEND'] = backend
+    from summarization_model import call_summarization_model, load_models
+
+    baseline_rss, _ = rss_mb()
+    start = time.perf_counter()
+    load_models()
+    load_seconds = time.perf_counter() - start
+    model_rss, _ = rss_mb()
+
+    summaries, latencies = [], []
+    for row in read_lectures(limit):
+        start = time.perf_counter()
+        summaries.append(call_summarization_model(row['lecture']))
+        latencies.append(time.perf_counter() - start)
+    _, peak_rss = rss_mb()
+
+    print(json.dumps({
+        'backend': backend,
+        'load_seconds': load_seconds,
+        'model_rss_mb': model_rss - baseline_rss,
+        'peak_rss_mb': peak_rss,
+        'latencies': latencies,
+        'summaries': summaries,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "torch-int8", "onnx"])
+    parser.add_argument("--limit", type=int, default=0, help="only use the first N lectures")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.limit)
+        return
+
+    references = [row['answer'] for row in read_lectures(args.limit)]
+    results = []
+    for backend in args.backends:
+        print(f"Running {backend}...")
+        proc = subprocess.run(
+            [sys.executable, __file__, "--worker", backend, "--limit", str(args.limit)],
+            capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            print(f"  {backend} failed:\n{proc.stderr.strip()[-2000:]}")
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    if not results:
+        return
+    reference_summaries = results[0]['summaries']
+    print(f"\n{'backend':<12} {'load s':>7} {'model MB':>9} {'peak MB':>8} {'mean s':>7} {'ROUGE-L':>8} {'vs ' + results[0]['backend']:>12}")
+    for r in results:
+        r['rouge'] = mean_scores([rouge_scores(s, ref) for s, ref in zip(r['summaries'], references)])
+        r['agreement'] = mean_scores([rouge_scores(s, ref) for s, ref in zip(r['summaries'], reference_summaries)])
+        r['mean_latency'] = sum(r['latencies']) / len(r['latencies'])
+        print(f"{r['backend']:<12} {r['load_seconds']:>7.1f} {r['model_rss_mb']:>9.0f} {r['peak_rss_mb']:>8.0f} "
+              f"{r['mean_latency']:>7.2f} {r['rouge']['rougeL']:>8.3f} {r['agreement']['rougeL']:>12.3f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ import sys
 import os
 sys.path.append(os.getcwd())
 
-from generate_audio import generate_audio
+from generate_audio import download_audio_array
 from transcribe import transcribe_lecture
 from summarization_model import call_summarization_model
 
@@ -10,11 +10,11 @@ test_link = "https://youtu.be/UFDOY1wOOz0?si=Onngf6ktjVOFKLt1"
 
 try:
     print("1. Generating audio...")
-    audio_path = generate_audio(test_link)
-    print(f"   Audio generated: {audio_path}")
+    audio = download_audio_array(test_link)
+    print(f"   Audio decoded: {len(audio) / 16000:.0f} seconds")
 
     print("2. Transcribing...")
-    text = transcribe_lecture(audio_path)
+    text = transcribe_lecture(audio)
     print(f"   Transcribed {len(text)} characters.")
 
     print("3. Summarizing...")
@@ -0,0 +1,46 @@
+import re
+from collections import Counter
+
+
+def _tokens(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def _f1(overlap, predicted, reference):
+    if not overlap or not predicted or not reference:
+        return 0.0
+    precision, recall = overlap / predicted, overlap / reference
+    return 2 * precision * recall / (precision + recall)
+
+
+def _ngrams(tokens, n):
+    return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+
+def _lcs_length(a, b):
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b):
+            current.append(previous[j] + 1 if x == y else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def rouge_scores(prediction, reference):
+    """ROUGE-1, ROUGE-2 and ROUGE-L F1 between a generated and a reference summary."""
+    pred, ref = _tokens(prediction), _tokens(reference)
+    scores = {}
+    for n in (1, 2):
+        pred_ngrams, ref_ngrams = _ngrams(pred, n), _ngrams(ref, n)
+        overlap = sum((pred_ngrams & ref_ngrams).values())
+        scores[f'rouge{n}'] = _f1(overlap, sum(pred_ngrams.values()), sum(ref_ngrams.values()))
+    scores['rougeL'] = _f1(_lcs_length(pred, ref), len(pred), len(ref))
+    return scores
+
+
+def mean_scores(score_dicts):
+    """Average a list of rouge_scores() results."""
+    if not score_dicts:
+        return {}
+    return {key: sum(s[key] for s in score_dicts) / len(score_dicts) for key in score_dicts[0]}
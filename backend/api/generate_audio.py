@@ -1,6 +1,39 @@
 import os
+import re
+import shutil
+import subprocess
+import tempfile
+import uuid
+import numpy as np
 import yt_dlp
 
+from metrics import stage
+
+# Whisper's input format: 16 kHz mono float32
+SAMPLE_RATE = 16000
+
+YOUTUBE_ID_REGEX = r"(?:youtube\.com\/(?:[^\/]+\/.+\/|(?:v|e(?:mbed)?)\/|.*[?&]v=)|youtu\.be\/)([^\"&?\/\s]{11})"
+
+
+def extract_video_id(video_url):
+    """Return the 11-character YouTube video ID in a link, or None."""
+    match = re.search(YOUTUBE_ID_REGEX, video_url)
+    return match.group(1) if match else None
+
+
+def _ydl_options(output_template):
+    return {
+        'format': 'bestaudio/best',
+        'outtmpl': output_template,
+        'quiet': True,
+        'no_warnings': True,
+        'nocheckcertificate': True,
+        'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36',
+        'referer': 'https://www.google.com/',
+        'socket_timeout': 60,
+        'retries': 10,
+    }
+
 
 def generate_audio(video_url):
     """Download audio from given video URL using yt-dlp.
@@ -12,26 +45,90 @@ def generate_audio(video_url):
     if not os.path.exists(output_path):
         os.makedirs(output_path)
     
-    ydl_opts = {
-        'format': 'bestaudio/best',
-        'outtmpl': os.path.join(output_path, '%(title)s.%(ext)s'),
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '128',
-        }],
-        'quiet': True,
-        'no_warnings': True,
-        'nocheckcertificate': True,
-        'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36',
-        'referer': 'https://www.google.com/',
-        'socket_timeout': 60,
-        'retries': 10,
-    }
+    # Name files by video ID plus a per-call suffix so concurrent jobs never share a file
+    ydl_opts = _ydl_options(os.path.join(output_path, f'%(id)s-{uuid.uuid4().hex[:8]}.%(ext)s'))
+    ydl_opts['postprocessors'] = [{
+        'key': 'FFmpegExtractAudio',
+        'preferredcodec': 'mp3',
+        'preferredquality': '128',
+    }]
     
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+    with stage('audio_download'), yt_dlp.YoutubeDL(ydl_opts) as ydl:
         info = ydl.extract_info(video_url, download=True)
         # The filename after post-processing will have .mp3 extension
         temp_audio_file = ydl.prepare_filename(info).rsplit('.', 1)[0] + '.mp3'
         
-    return temp_audio_file
\ No newline at end of file
+    return temp_audio_file
+
+
+# Bytes read from ffmpeg at a time, about 30 s of 16 kHz s16le audio
+_DECODE_CHUNK_BYTES = 1 << 20
+
+
+def decode_audio(source, headers=None, name='audio'):
+    """Decode a file path or media URL to 16 kHz mono float32 samples through an ffmpeg pipe.
+
+    Samples are converted chunk by chunk into a temporary file named after
+    `name` (the video ID) and returned as an np.memmap of it, so a long
+    lecture is never held in memory whole: pages are read in as Whisper
+    reaches them. The file is unlinked once mapped; its disk space is freed
+    when the array is garbage collected.
+    """
+    cmd = ["ffmpeg", "-nostdin", "-threads", "0"]
+    if headers:
+        cmd += ["-headers", "".join(f"{k}: {v}\r\n" for k, v in headers.items())]
+    cmd += ["-i", source, "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-"]
+    handle, path = tempfile.mkstemp(prefix=f"{name}_", suffix=".f32")
+    try:
+        with os.fdopen(handle, "wb") as out, tempfile.TemporaryFile() as errors:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors)
+            try:
+                remainder = b""
+                while True:
+                    raw = process.stdout.read(_DECODE_CHUNK_BYTES)
+                    if not raw:
+                        break
+                    raw = remainder + raw
+                    usable = len(raw) - len(raw) % 2
+                    remainder = raw[usable:]
+                    out.write((np.frombuffer(raw[:usable], np.int16).astype(np.float32) / 32768.0).tobytes())
+            except BaseException:
+                process.kill()
+                raise
+            finally:
+                process.stdout.close()
+                returncode = process.wait()
+            if returncode != 0 or not out.tell():
+                errors.seek(0)
+                raise RuntimeError(f"ffmpeg could not decode audio: {errors.read().decode(errors='ignore')[-500:]}")
+        # Writable (r+), as torch.from_numpy expects; nobody else can open the file
+        return np.memmap(path, dtype=np.float32, mode="r+")
+    finally:
+        os.remove(path)
+
+
+def download_audio_array(video_url):
+    """Fetch a video's audio as Whisper-ready samples, decoding it exactly once.
+
+    ffmpeg reads the best audio stream straight from the URL yt-dlp resolves,
+    so the compressed audio is never written to disk and there is no mp3
+    re-encode. If streaming fails, the original audio is downloaded to a
+    private temporary directory, decoded, and the directory removed.
+    Returns:
+        - samples (np.memmap): 16 kHz mono float32 audio backed by a temporary file
+          (see decode_audio), accepted directly by transcribe_lecture."""
+    with stage('audio_download'):
+        with yt_dlp.YoutubeDL(_ydl_options('%(id)s.%(ext)s')) as ydl:
+            info = ydl.extract_info(video_url, download=False)
+        try:
+            return decode_audio(info['url'], info.get('http_headers'), info.get('id', 'video'))
+        except Exception as e:
+            print(f"Streaming decode failed ({e}), downloading {info.get('id')} instead...")
+
+        job_dir = tempfile.mkdtemp(prefix=f"audio_{info.get('id', 'video')}_")
+        try:
+            with yt_dlp.YoutubeDL(_ydl_options(os.path.join(job_dir, '%(id)s.%(ext)s'))) as ydl:
+                downloaded = ydl.prepare_filename(ydl.extract_info(video_url, download=True))
+            return decode_audio(downloaded, name=info.get('id', 'video'))
+        finally:
+            shutil.rmtree(job_dir, ignore_errors=True)
@@ -0,0 +1,24 @@
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 7860)}"
+# Exactly one worker: background jobs (jobs.py) and live recording sessions
+# (live_sessions.py) are held in the worker's memory, so a second worker would
+# answer 404 for jobs and sessions created by the first. Scale with threads.
+workers = 1
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = 600
+
+# Import the app (and load the models) in the master, so a restarted worker
+# gets the weights copy-on-write instead of loading them again
+preload_app = True
+
+
+def on_starting(server):
+    from preload import preload_models
+    preload_models()
+
+
+def post_fork(server, worker):
+    # In a thread, so the worker serves /api/ready (503) while it warms up
+    from preload import warm_up_in_background
+    warm_up_in_background()
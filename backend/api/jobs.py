@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import collect_timings, stage
+
+# Long summaries run on a small worker pool; requests only enqueue work
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 1))
+# Live session finalizes are short, and get their own pool so they never wait behind a Whisper run
+FINALIZE_WORKERS = int(os.environ.get('FINALIZE_WORKERS', 1))
+JOB_MAX_QUEUED = int(os.environ.get('JOB_MAX_QUEUED', 8))
+JOB_RETAIN_SECONDS = int(os.environ.get('JOB_RETAIN_SECONDS', 3600))
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the queue is at its depth limit."""
+
+
+class Job:
+    """A unit of background work with stage progress and a final result."""
+
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = 'queued'
+        self.stage = None
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished_at = None
+        self.timings = []
+        self.events = []
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def update(self, stage, **info):
+        """Record progress, e.g. job.update('summarize', done=2, total=5)."""
+        with self._cond:
+            self.stage = stage
+            self.events.append(dict(info, stage=stage, time=time.time()))
+            self._cond.notify_all()
+
+    def _finish(self, status, result=None, error=None):
+        with self._cond:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            self._cond.notify_all()
+
+    def to_dict(self, include_timings=False):
+        with self._cond:
+            state = {
+                'job_id': self.id,
+                'status': self.status,
+                'stage': self.stage,
+                'progress': self.events[-1] if self.events else None,
+                'result': self.result,
+                'error': self.error,
+            }
+            if include_timings:
+                state['timings'] = list(self.timings)
+            return state
+
+    def stream(self, heartbeat=15):
+        """Yield Server-Sent-Events frames until the job finishes."""
+        index = 0
+        while True:
+            with self._cond:
+                if index >= len(self.events) and not self.finished:
+                    self._cond.wait(heartbeat)
+                new_events = self.events[index:]
+                index = len(self.events)
+                finished = self.finished
+            for event in new_events:
+                yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+            if finished:
+                yield f"event: {self.status}\ndata: {json.dumps(self.to_dict())}\n\n"
+                return
+            if not new_events:
+                yield ": keep-alive\n\n"
+
+
+class JobManager:
+    """Runs jobs on a bounded thread pool.
+
+    Submitting a job whose key is already queued or running returns the
+    existing job instead of doing the work twice. Once `max_queued` jobs are
+    waiting for a worker, further submissions raise QueueFull.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, max_queued=JOB_MAX_QUEUED, retain_seconds=JOB_RETAIN_SECONDS, name='job'):
+        self.max_queued = max_queued
+        self.retain_seconds = retain_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._jobs = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args):
+        """Queue `fn(job, *args)`; its return value becomes the job result.
+
+        Returns (job, created) where `created` is False for a deduplicated job.
+        """
+        with self._lock:
+            self._purge()
+            existing = self._in_flight.get(key)
+            if existing is not None:
+                return existing, False
+            if self._queued() >= self.max_queued:
+                raise QueueFull(f"{self.max_queued} jobs already waiting")
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+        self._executor.submit(self._run, job, fn, args)
+        return job, True
+
+    def _run(self, job, fn, args):
+        with self._lock:
+            job.status = 'running'
+        try:
+            with collect_timings() as timings:
+                job.timings = timings
+                timings.append({'stage': 'queue_wait', 'seconds': round(time.time() - job.created, 4)})
+                with stage('job'):
+                    result = fn(job, *args)
+            job._finish('done', result=result)
+        except Exception as e:
+            job._finish('failed', error=str(e))
+        finally:
+            with self._lock:
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+
+    def _purge(self):
+        cutoff = time.time() - self.retain_seconds
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _queued(self):
+        return sum(1 for job in self._in_flight.values() if job.status == 'queued')
+
+    def queue_depth(self):
+        """Number of jobs waiting for a worker."""
+        with self._lock:
+            return self._queued()
+
+    def running(self):
+        """Number of jobs currently executing."""
+        with self._lock:
+            return sum(1 for job in self._in_flight.values() if job.status == 'running')
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from summarization_model import IncrementalSummarizer
+
+# Live recording sessions summarize finished chunks on a shared background pool
+LIVE_SESSION_WORKERS = int(os.environ.get('LIVE_SESSION_WORKERS', 1))
+LIVE_SESSION_MAX = int(os.environ.get('LIVE_SESSION_MAX', 32))
+LIVE_SESSION_TTL = int(os.environ.get('LIVE_SESSION_TTL', 4 * 3600))
+
+
+class TooManySessions(Exception):
+    """Raised when creating a session while LIVE_SESSION_MAX are open."""
+
+
+class LiveSession:
+    """Transcript of one recording, summarized chunk by chunk as it arrives."""
+
+    def __init__(self, executor):
+        self.id = uuid.uuid4().hex
+        self.words = 0
+        self.updated = time.time()
+        self._summarizer = IncrementalSummarizer(executor=executor)
+        self._version = 0
+        self._summary = None
+        self._summary_version = None
+        self._lock = threading.Lock()
+
+    def append(self, delta):
+        """Add newly recognized text; completed chunks start summarizing in the background."""
+        with self._lock:
+            if delta.strip():
+                self._summarizer.feed(delta)
+                self.words += len(delta.split())
+                self._version += 1
+            self.updated = time.time()
+
+    @property
+    def version(self):
+        """Changes whenever text is appended; identifies what a summary covers."""
+        return self._version
+
+    def cached_summary(self):
+        """The summary from finalize() if nothing was appended since, else None."""
+        with self._lock:
+            return self._summary if self._summary_version == self._version else None
+
+    def finalize(self):
+        """Summary of everything appended so far.
+
+        Only the unfinished last chunk and the reduce step run here; chunk
+        summaries already computed in the background are reused, and the
+        result is reused until more text is appended.
+        """
+        with self._lock:
+            if self._summary_version != self._version:
+                self._summary = self._summarizer.finish()
+                self._summary_version = self._version
+            self.updated = time.time()
+            return self._summary
+
+    def close(self):
+        """Cancel chunk summaries still queued for this session."""
+        self._summarizer.close()
+
+    def status(self):
+        return {
+            'session_id': self.id,
+            'words': self.words,
+            'chunks_queued': self._summarizer.chunks_queued,
+            'chunks_done': self._summarizer.chunks_done,
+        }
+
+
+class SessionManager:
+    """Open live sessions, expired after LIVE_SESSION_TTL seconds without activity."""
+
+    def __init__(self, workers=LIVE_SESSION_WORKERS, max_sessions=LIVE_SESSION_MAX, ttl=LIVE_SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='live-summary')
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self):
+        with self._lock:
+            self._expire()
+            if len(self._sessions) >= self.max_sessions:
+                raise TooManySessions(f"{self.max_sessions} sessions already open")
+            session = LiveSession(self._executor)
+            self._sessions[session.id] = session
+            return session
+
+    def get(self, session_id):
+        with self._lock:
+            self._expire()
+            return self._sessions.get(session_id)
+
+    def close(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.close()
+        return True
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for session_id in [s.id for s in self._sessions.values() if s.updated < cutoff]:
+            self._sessions.pop(session_id).close()
@@ -0,0 +1,155 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from a cache lookup up to a long lecture
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_metrics = []
+_local = threading.local()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}"
+
+
+class Histogram:
+    """Prometheus histogram keyed by label values."""
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(key, {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                labels = dict(key)
+                for bound, count in zip(self.buckets, series['counts']):
+                    lines.append(f"{self.name}_bucket{_format_labels(dict(labels, le=bound))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(dict(labels, le='+Inf'))} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {series['count']}")
+        return lines
+
+
+class Gauge:
+    """Prometheus gauge, either set directly or read from `callback` at scrape time.
+
+    A callback may return a number, or a dict mapping label tuples
+    (e.g. (('model', 'whisper'),)) to numbers.
+    """
+    metric_type = 'gauge'
+
+    def __init__(self, name, help_text, callback=None):
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+        self._value = 0
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        value = self.callback() if self.callback else self._value
+        if isinstance(value, dict):
+            lines += [f"{self.name}{_format_labels(dict(key))} {v}" for key, v in value.items() if v is not None]
+        elif value is not None:
+            lines.append(f"{self.name} {value}")
+        return lines
+
+
+class Counter(Gauge):
+    """Prometheus counter: a value that only goes up, so rate() applies.
+
+    Names should end in `_total`. Like Gauge, it can read a monotonic count
+    from `callback` at scrape time.
+    """
+    metric_type = 'counter'
+
+    def dec(self, amount=1):
+        raise ValueError("counters cannot decrease")
+
+
+STAGE_SECONDS = Histogram('lecture_stage_duration_seconds', 'Time spent in each pipeline stage')
+
+
+@contextmanager
+def collect_timings():
+    """Collect the stages timed on this thread into a list, for a per-request breakdown."""
+    previous = getattr(_local, 'timings', None)
+    _local.timings = []
+    try:
+        yield _local.timings
+    finally:
+        _local.timings = previous
+
+
+def current_timings():
+    """The list collect_timings() is filling on this thread, or None."""
+    return getattr(_local, 'timings', None)
+
+
+@contextmanager
+def bind_timings(timings):
+    """Record stages timed on this thread into `timings`, a list from current_timings().
+
+    collect_timings() only sees stages on its own thread; work it hands to an
+    executor captures current_timings() at submit time and binds it in the
+    worker thread, so those stages still count towards the breakdown.
+    """
+    previous = getattr(_local, 'timings', None)
+    _local.timings = timings
+    try:
+        yield
+    finally:
+        _local.timings = previous
+
+
+@contextmanager
+def stage(name, **labels):
+    """Time a pipeline stage, e.g. `with stage('transcribe'):`.
+
+    Records the duration in the stage histogram and, inside collect_timings(),
+    in the current request's breakdown.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        STAGE_SECONDS.observe(seconds, stage=name, **labels)
+        timings = getattr(_local, 'timings', None)
+        if timings is not None:
+            timings.append(dict(labels, stage=name, seconds=round(seconds, 4)))
+
+
+def render():
+    """All registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _metrics:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
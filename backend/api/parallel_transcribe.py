@@ -0,0 +1,183 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import whisper
+
+from metrics import stage
+
+SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+# Worker processes used for transcription; each holds its own Whisper model.
+# 1 keeps transcription in-process (see transcribe.transcribe_segments)
+TRANSCRIBE_WORKERS = int(os.environ.get('TRANSCRIBE_WORKERS', 1))
+# Audio is cut near every SEGMENT_SECONDS, at the quietest point within SEARCH_SECONDS
+SEGMENT_SECONDS = int(os.environ.get('TRANSCRIBE_SEGMENT_SECONDS', 60))
+SEARCH_SECONDS = 5
+FRAME_SECONDS = 0.03
+# A frame counts as a pause when its energy is below this fraction of the recording's median frame
+SILENCE_RATIO = 0.1
+# Pieces cut where there is no pause overlap by this much either side, and are deduplicated by word
+OVERLAP_SECONDS = 2
+
+# Per-process state: the worker's model, and the parent's shared pool
+_worker_model = None
+_pool = None
+_pool_workers = None
+
+
+def find_silence_splits(samples, segment_seconds=SEGMENT_SECONDS, search_seconds=SEARCH_SECONDS):
+    """Return (sample offset, is_pause) for each place the audio should be cut.
+
+    Aims for a cut every `segment_seconds`, moved to the lowest-energy frame
+    within `search_seconds` either side. `is_pause` is False when even that
+    frame is not quiet enough to be a pause (continuous speech or music), so
+    the cut may land inside a word.
+    """
+    frame = int(FRAME_SECONDS * SAMPLE_RATE)
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return []
+    # Squared a minute at a time, so long (memory-mapped) audio is never copied whole
+    energy = np.empty(n_frames, dtype=np.float32)
+    block = int(60 / FRAME_SECONDS)
+    for i in range(0, n_frames, block):
+        j = min(i + block, n_frames)
+        energy[i:j] = np.sqrt(np.mean(samples[i * frame:j * frame].reshape(j - i, frame) ** 2, axis=1))
+    threshold = SILENCE_RATIO * float(np.median(energy))
+
+    splits = []
+    step = int(segment_seconds / FRAME_SECONDS)
+    search = int(search_seconds / FRAME_SECONDS)
+    target = step
+    while target < n_frames - search:
+        lo, hi = max(target - search, 1), min(target + search, n_frames - 1)
+        cut = lo + int(np.argmin(energy[lo:hi]))
+        splits.append((cut * frame, bool(energy[cut] <= threshold)))
+        target = cut + step
+    return splits
+
+
+def _pieces(samples, splits, overlap_seconds=OVERLAP_SECONDS):
+    """(start sample, samples, keep_from, keep_to) for each piece between the cuts.
+
+    Each piece owns the words whose midpoint lies in [keep_from, keep_to)
+    seconds. At a pause the pieces meet exactly; elsewhere both are extended
+    by `overlap_seconds` past the cut, so a word straddling it is decoded
+    whole on both sides and kept once.
+    """
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    bounds = [(0, True)] + splits + [(len(samples), True)]
+    pieces = []
+    for (cut_from, pause_from), (cut_to, pause_to) in zip(bounds, bounds[1:]):
+        if cut_to <= cut_from:
+            continue
+        start = cut_from if pause_from else max(0, cut_from - overlap)
+        end = cut_to if pause_to else min(len(samples), cut_to + overlap)
+        pieces.append((start, samples[start:end], cut_from / SAMPLE_RATE, cut_to / SAMPLE_RATE))
+    return pieces
+
+
+def _init_worker(threads):
+    global _worker_model
+    import torch
+    torch.set_num_threads(threads)
+    _worker_model = whisper.load_model("tiny")
+
+
+def _local_model():
+    # The single-worker path shares the app's model instead of loading another
+    from transcribe import _load_whisper
+    return _load_whisper()
+
+
+def _transcribe_piece(model, offset, samples, keep_from=0.0, keep_to=float('inf')):
+    """Segments of one piece, in absolute seconds, keeping only words whose midpoint is in [keep_from, keep_to)."""
+    result = model.transcribe(samples, word_timestamps=True)
+    seconds = offset / SAMPLE_RATE
+    segments = []
+    for s in result['segments']:
+        # Without word timestamps the whole segment counts as one word
+        words = [(w['start'], w['end'], w['word']) for w in s.get('words') or []] or [(s['start'], s['end'], s['text'])]
+        kept = [w for w in words if keep_from <= seconds + (w[0] + w[1]) / 2 < keep_to]
+        if kept:
+            segments.append({
+                'start': seconds + kept[0][0],
+                'end': seconds + kept[-1][1],
+                'text': "".join(w[2] for w in kept).strip(),
+            })
+    return segments
+
+
+def _transcribe_segment(offset, samples, keep_from, keep_to):
+    return _transcribe_piece(_worker_model, offset, samples, keep_from, keep_to)
+
+
+def _get_pool(workers):
+    """Reuse one pool per worker count so models are loaded once per process."""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown()
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        print(f"Starting {workers} Whisper worker processes...")
+        _pool = ProcessPoolExecutor(
+            max_workers=workers,
+            # Spawn rather than fork: forking a process that already ran torch can deadlock
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(threads,)
+        )
+        _pool_workers = workers
+    return _pool
+
+
+def warm_up(workers=None):
+    """Start every worker process (or the in-process model) and run it once ahead of the first request."""
+    workers = workers or TRANSCRIBE_WORKERS
+    silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    if workers == 1:
+        _transcribe_piece(_local_model(), 0, silence)
+        return
+    list(_get_pool(workers).map(_transcribe_segment, [0] * workers, [silence] * workers, [0.0] * workers, [1.0] * workers))
+
+
+def iter_parallel_segments(audio, workers=None, segment_seconds=SEGMENT_SECONDS):
+    """Transcribe an audio file (or 16 kHz float32 array) across a process pool.
+
+    The audio is split at silences and each piece is transcribed by a worker
+    with its own preloaded Whisper model. Segments are yielded in order, with
+    timestamps offset to the full recording, as soon as every piece before
+    them is done. Where no pause is found near a cut, neighbouring pieces
+    overlap and each word is kept by the piece its midpoint falls in (see
+    _pieces). With one worker the pieces run in this process.
+    """
+    workers = workers or TRANSCRIBE_WORKERS
+    samples = audio if isinstance(audio, np.ndarray) else whisper.load_audio(audio)
+    pieces = _pieces(samples, find_silence_splits(samples, segment_seconds))
+
+    if workers == 1:
+        model = _local_model()
+        for piece in pieces:
+            with stage('transcribe', mode='parallel'):
+                piece_segments = _transcribe_piece(model, *piece)
+            yield from piece_segments
+        return
+
+    pool = _get_pool(workers)
+    futures = [pool.submit(_transcribe_segment, *piece) for piece in pieces]
+    try:
+        for future in futures:
+            with stage('transcribe', mode='parallel'):
+                piece_segments = future.result()
+            yield from piece_segments
+    finally:
+        # Stop queued pieces if the caller gives up early
+        for future in futures:
+            future.cancel()
+
+
+def transcribe_parallel(audio, workers=None, segment_seconds=SEGMENT_SECONDS):
+    """Transcribe audio with iter_parallel_segments; returns a dict with the `text` and the timestamped `segments`."""
+    segments = list(iter_parallel_segments(audio, workers, segment_seconds))
+    return {'text': " ".join(s['text'] for s in segments if s['text']), 'segments': segments}
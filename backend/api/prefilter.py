@@ -0,0 +1,114 @@
+"""Cheap extractive pass that shrinks a transcript before abstractive summarization.
+
+Filler words and stutters are stripped, sentences are scored with TextRank
+over TF-IDF cosine similarity, and the best-ranked sentences are kept (in
+their original order) until a token budget is spent.
+"""
+import re
+
+import numpy as np
+
+# Interjections that carry no content in spoken lectures
+_FILLER_WORDS = re.compile(r"\b(?:u+m+|u+h+|e+r+m+|hm+|m{2,}|ah+)\b[,.]?\s*", re.IGNORECASE)
+# Parenthetical filler phrases, only when set off by a comma ("..., you know, ...")
+_FILLER_PHRASES = re.compile(r",?\s*\b(?:you know|I mean|sort of|kind of)\b,\s*", re.IGNORECASE)
+# Stutters: a word said three or more times in a row ("so so so"), or a doubled
+# word that is never doubled in correct English ("the the"); "had had" and
+# "that that" are left alone
+_REPEATS = re.compile(r"\b(\w+)(?:\s+\1\b){2,}", re.IGNORECASE)
+_DOUBLED = re.compile(r"\b(the|a|an|i|and|to|of|we|you|but)\s+\1\b", re.IGNORECASE)
+# Function words left out of the TF-IDF vectors so they do not make sentences look alike
+_STOP_WORDS = frozenset("""
+a an the and or but if so then than that this these those it its is are was were be been being
+i you he she we they me him her us them my your our their what which who whom when where why how
+of to in on at by for with from as into about over after before up down out not no do does did
+have has had can could will would should may might must just also very there here all some any
+okay ok yeah right well now going gonna want
+""".split())
+
+
+def remove_fillers(text):
+    """Drop interjections, parenthetical filler phrases and stuttered repeats."""
+    text = _FILLER_WORDS.sub("", text)
+    text = _FILLER_PHRASES.sub(" ", text)
+    text = _REPEATS.sub(r"\1", text)
+    text = _DOUBLED.sub(r"\1", text)
+    text = re.sub(r"\s+([,.!?])", r"\1", text)
+    text = re.sub(r",(?=[,.!?])", "", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def tfidf_matrix(sentences):
+    """Row-normalized TF-IDF vectors of the sentences, as a dense (sentences x terms) array.
+
+    Only terms that occur in more than one sentence get a column: the others
+    cannot contribute to the similarity between two sentences, but they still
+    count towards each row's norm.
+    """
+    vocab = {}
+    rows, cols = [], []
+    for i, sentence in enumerate(sentences):
+        for word in re.findall(r"[a-z0-9']+", sentence.lower()):
+            if word in _STOP_WORDS:
+                continue
+            rows.append(i)
+            cols.append(vocab.setdefault(word, len(vocab)))
+    n = len(sentences)
+    if not vocab:
+        return np.zeros((n, 0), dtype=np.float32)
+
+    # Sparse (row, term) counts, collapsed to unique pairs
+    pairs, counts = np.unique(np.array(rows) * len(vocab) + np.array(cols), return_counts=True)
+    rows, cols = pairs // len(vocab), pairs % len(vocab)
+    df = np.bincount(cols, minlength=len(vocab))
+    weights = counts * np.log(n / df[cols])
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n))
+    norms[norms == 0] = 1.0
+
+    shared = df > 1
+    columns = np.cumsum(shared) - 1
+    keep = shared[cols]
+    matrix = np.zeros((n, int(shared.sum())), dtype=np.float32)
+    matrix[rows[keep], columns[cols[keep]]] = weights[keep] / norms[rows[keep]]
+    return matrix
+
+
+def textrank_scores(similarity, damping=0.85, iterations=100, tolerance=1e-6):
+    """PageRank centrality of each sentence over a sentence similarity matrix."""
+    n = len(similarity)
+    weights = similarity.astype(np.float64)
+    np.fill_diagonal(weights, 0.0)
+    out = weights.sum(axis=1, keepdims=True)
+    # Sentences with no similar neighbours spread their rank uniformly
+    transition = np.where(out > 0, weights / np.where(out > 0, out, 1.0), 1.0 / n)
+    scores = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tolerance:
+            return updated
+        scores = updated
+    return scores
+
+
+def select_sentences(sentences, lengths, budget, redundancy=0.8):
+    """Indices (in original order) of the top-ranked sentences that fit in `budget`.
+
+    `lengths` gives each sentence's cost in tokens. Sentences whose cosine
+    similarity to an already kept sentence exceeds `redundancy` are skipped
+    as repetition. At least one sentence is always kept.
+    """
+    if not sentences:
+        return []
+    matrix = tfidf_matrix(sentences)
+    similarity = matrix @ matrix.T
+    scores = textrank_scores(similarity)
+
+    kept, spent = [], 0
+    for i in np.argsort(-scores, kind='stable'):
+        if kept and spent + lengths[i] > budget:
+            continue
+        if kept and similarity[i, kept].max() > redundancy:
+            continue
+        kept.append(int(i))
+        spent += lengths[i]
+    return sorted(kept)
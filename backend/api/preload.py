@@ -0,0 +1,83 @@
+import gc
+import threading
+import time
+
+import numpy as np
+
+from summarization_model import load_models, model_status
+from parallel_transcribe import TRANSCRIBE_WORKERS, warm_up as warm_up_transcribe_pool
+from transcribe import SAMPLE_RATE, _load_whisper, whisper_status
+
+_warm_up_seconds = None
+_preload_error = None
+_warm_up_thread = None
+_warm_up_lock = threading.Lock()
+
+
+def preload_models():
+    """Load BART and Whisper into this process.
+
+    Under gunicorn this runs in the master before the worker forks (see
+    gunicorn.conf.py), so a restarted worker gets the weights copy-on-write
+    instead of loading them again. gc.freeze() moves the loaded objects out of
+    the collector's reach, so garbage collection in the worker does not touch
+    (and copy) the shared pages.
+    """
+    global _preload_error
+    try:
+        load_models()
+        _load_whisper()
+    except Exception as e:
+        _preload_error = str(e)
+        print(f"Model preload failed: {e}")
+        return
+    gc.collect()
+    gc.freeze()
+
+
+def warm_up():
+    """Run one tiny inference through each model so the first request is not slow.
+
+    Done per worker after forking: it initializes torch's thread pools, which
+    must not be created in the master before fork. Usually started through
+    warm_up_in_background().
+    """
+    global _warm_up_seconds, _preload_error
+    start = time.perf_counter()
+    try:
+        model, tokenizer = load_models()
+        inputs = tokenizer("The lecture covered the basics of supply and demand.", return_tensors="pt")
+        model.generate(inputs['input_ids'], max_length=20, num_beams=1)
+        _load_whisper().transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))
+        if TRANSCRIBE_WORKERS > 1:
+            # Start the transcription processes now rather than on the first lecture
+            warm_up_transcribe_pool()
+    except Exception as e:
+        _preload_error = str(e)
+        print(f"Model warm-up failed: {e}")
+        return
+    _warm_up_seconds = time.perf_counter() - start
+    print(f"Models warmed up in {_warm_up_seconds:.1f}s")
+
+
+def warm_up_in_background():
+    """Load and warm the models in a daemon thread, so /api/ready can answer meanwhile.
+
+    Only the first call in a process starts the thread; later calls are no-ops.
+    """
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=warm_up, name='warm-up', daemon=True)
+            _warm_up_thread.start()
+
+
+def readiness():
+    """Report whether the models are loaded and warmed up, with their load timings."""
+    summarizer, whisper = model_status(), whisper_status()
+    return {
+        'ready': summarizer['loaded'] and whisper['loaded'] and _warm_up_seconds is not None,
+        'models': {'summarizer': summarizer, 'whisper': whisper},
+        'warm_up_seconds': _warm_up_seconds,
+        'error': _preload_error,
+    }
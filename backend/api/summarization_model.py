@@ -1,80 +1,431 @@
-from transformers import BartTokenizer, BartForConditionalGeneration
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import math
+import re
+import threading
+import time
+import torch
 import os
 
+from metrics import bind_timings, current_timings, stage
+from prefilter import remove_fillers, select_sentences
+from summarizer_backends import get_backend
+
 # Global models to avoid reloading on every request
 _model = None
 _tokenizer = None
+_model_name = None
+_load_seconds = None
+_load_lock = threading.Lock()
+_backend = get_backend()
+
+# Chunk summaries are generated in micro-batches of at most BATCH_SIZE chunks,
+# capped at MAX_BATCH_TOKENS padded input tokens to keep memory bounded
+BATCH_SIZE = int(os.environ.get('SUMMARY_BATCH_SIZE', 4))
+MAX_BATCH_TOKENS = int(os.environ.get('SUMMARY_MAX_BATCH_TOKENS', 4096))
+
+# Long transcripts are split at sentence boundaries into chunks of at most
+# CHUNK_TOKENS tokens (BART reads 1024 including special tokens), with
+# consecutive chunks sharing about CHUNK_OVERLAP_TOKENS tokens of context
+MAX_INPUT_TOKENS = 1024
+CHUNK_TOKENS = int(os.environ.get('SUMMARY_CHUNK_TOKENS', 1000))
+CHUNK_OVERLAP_TOKENS = int(os.environ.get('SUMMARY_CHUNK_OVERLAP_TOKENS', 50))
+# Upper bound on how many times chunk summaries are summarized again
+MAX_REDUCE_LEVELS = int(os.environ.get('SUMMARY_MAX_REDUCE_LEVELS', 3))
+# Transcripts longer than one chunk can first be cut down extractively to
+# this fraction of their tokens (1.0 leaves them untouched)
+PREFILTER_RATIO = float(os.environ.get('SUMMARY_PREFILTER_RATIO', 1.0))
+# Unpunctuated captions are cut into pseudo-sentences of this many words
+MAX_SENTENCE_WORDS = 60
+
+# Each chunk (map) and group of summaries (reduce) is summarized with these settings
+CHUNK_GENERATE_KWARGS = {
+    'max_length': 150,
+    'num_beams': 1, # Greedy search is MUCH faster than beam search
+    'no_repeat_ngram_size': 3,
+    'repetition_penalty': 1.2,
+    'early_stopping': True,
+}
+# Text that fits in a single chunk gets one longer summary instead
+SINGLE_GENERATE_KWARGS = dict(CHUNK_GENERATE_KWARGS, max_length=500, length_penalty=1.0)
 
 def load_models():
-    global _model, _tokenizer
+    global _model, _tokenizer, _model_name, _load_seconds
     if _model is not None:
         return _model, _tokenizer
 
-    model_path = 'fine_tuned_bart_model'
-    
-    # Check if model file is likely a Git LFS pointer (very small size)
-    weights_path = os.path.join(model_path, 'model.safetensors')
-    if os.path.exists(weights_path) and os.path.getsize(weights_path) < 1000:
-        print(f"Warning: {weights_path} appears to be a Git LFS pointer. Falling back to 'facebook/bart-base'.")
-        model_name = 'facebook/bart-base'
-    elif not os.path.exists(model_path):
-        print(f"Warning: {model_path} not found. Falling back to 'facebook/bart-base'.")
-        model_name = 'facebook/bart-base'
-    else:
-        model_name = model_path
-
-    try:
-        print(f"Loading summarization model: {model_name}...")
-        _model = BartForConditionalGeneration.from_pretrained(model_name)
-        _tokenizer = BartTokenizer.from_pretrained(model_name)
-    except Exception as e:
-        print(f"Error loading {model_name}: {e}. Falling back to 'facebook/bart-base'.")
-        _model = BartForConditionalGeneration.from_pretrained('facebook/bart-base')
-        _tokenizer = BartTokenizer.from_pretrained('facebook/bart-base')
+    with _load_lock:
+        if _model is not None:
+            return _model, _tokenizer
+
+        model_path = 'fine_tuned_bart_model'
+        
+        # Check if model file is likely a Git LFS pointer (very small size)
+        weights_path = os.path.join(model_path, 'model.safetensors')
+        if os.path.exists(weights_path) and os.path.getsize(weights_path) < 1000:
+            print(f"Warning: {weights_path} appears to be a Git LFS pointer. Falling back to 'facebook/bart-base'.")
+            model_name = 'facebook/bart-base'
+        elif not os.path.exists(model_path):
+            print(f"Warning: {model_path} not found. Falling back to 'facebook/bart-base'.")
+            model_name = 'facebook/bart-base'
+        else:
+            model_name = model_path
+
+        start = time.perf_counter()
+        try:
+            print(f"Loading summarization model: {model_name} ({_backend.name} backend)...")
+            model, tokenizer = _backend.load(model_name)
+        except Exception as e:
+            print(f"Error loading {model_name}: {e}. Falling back to 'facebook/bart-base'.")
+            model_name = 'facebook/bart-base'
+            model, tokenizer = _backend.load(model_name)
+        _load_seconds = time.perf_counter() - start
+        _model, _tokenizer, _model_name = model, tokenizer, model_name
     
     return _model, _tokenizer
 
-def call_summarization_model(lecture_transcript):
-    """Call the fine-tuned BART model to generate a summary with chunking for long text."""
-    model, tokenizer = load_models()
+def model_status():
+    """Load state of the summarization model, for the readiness endpoint."""
+    return {
+        'loaded': _model is not None,
+        'name': _model_name,
+        'backend': _backend.name,
+        'load_seconds': _load_seconds,
+    }
+
+def model_fingerprint():
+    """Identify the loaded model and generation settings, for keying cached summaries."""
+    load_models()
+    fingerprint = (f"{_model_name}|{_backend.name}|chunk={CHUNK_TOKENS}|overlap={CHUNK_OVERLAP_TOKENS}"
+                   f"|levels={MAX_REDUCE_LEVELS}|chunk_max=150|max=500|greedy|ngram=3|rep=1.2")
+    if PREFILTER_RATIO < 1:
+        fingerprint += f"|prefilter={PREFILTER_RATIO}"
+    return fingerprint
+
+def _split_sentences(text):
+    """Split on sentence punctuation, cutting over-long or unpunctuated runs by word count."""
+    sentences = []
+    for sentence in re.split(r'(?<=[.!?])\s+', text.strip()):
+        words = sentence.split()
+        for i in range(0, len(words), MAX_SENTENCE_WORDS):
+            sentences.append(" ".join(words[i:i + MAX_SENTENCE_WORDS]))
+    return sentences
+
+def _sentence_lengths(sentences, tokenizer):
+    # A leading space makes each count match the sentence's tokens inside the joined text
+    if not sentences:
+        return []
+    return [len(ids) for ids in tokenizer([" " + s for s in sentences], add_special_tokens=False)['input_ids']]
+
+def prefilter_transcript(text, tokenizer, compression_ratio, min_tokens=None):
+    """Shrink a transcript to about `compression_ratio` of its tokens before summarizing.
+
+    Filler words are removed, then the most central sentences (TextRank over
+    TF-IDF similarity, see prefilter.py) are kept in their original order.
+    The budget never drops below `min_tokens` (default: one chunk), so text
+    that already fits in a single call is only cleaned of fillers. Returns
+    (text, stats).
+    """
+    if not 0 < compression_ratio <= 1:
+        raise ValueError(f"compression ratio must be in (0, 1], got {compression_ratio}")
+    min_tokens = min_tokens or CHUNK_TOKENS
+    sentences = _split_sentences(text)
+    lengths = _sentence_lengths(sentences, tokenizer)
+    cleaned = _split_sentences(remove_fillers(text))
+    cleaned_lengths = _sentence_lengths(cleaned, tokenizer)
+    budget = max(int(sum(lengths) * compression_ratio), min_tokens)
+    kept = select_sentences(cleaned, cleaned_lengths, budget) if sum(cleaned_lengths) > budget else range(len(cleaned))
+    stats = {
+        'ratio': compression_ratio,
+        'tokens_before': sum(lengths),
+        'tokens_after': sum(cleaned_lengths[i] for i in kept),
+        'sentences_before': len(sentences),
+        'sentences_after': len(kept),
+    }
+    return " ".join(cleaned[i] for i in kept), stats
+
+def chunk_by_tokens(text, tokenizer, chunk_tokens=None, overlap_tokens=None):
+    """Pack whole sentences into chunks of at most `chunk_tokens` tokenizer tokens.
+
+    Each chunk after the first starts with the trailing sentences of the one
+    before it, up to `overlap_tokens` tokens. Returns a list of chunk texts.
+    """
+    chunk_tokens = chunk_tokens or CHUNK_TOKENS
+    overlap_tokens = CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+    sentences = _split_sentences(text)
+    if not sentences:
+        return []
+    lengths = _sentence_lengths(sentences, tokenizer)
+
+    chunks = []
+    start = 0
+    while start < len(sentences):
+        end, total = start, 0
+        while end < len(sentences) and (end == start or total + lengths[end] <= chunk_tokens):
+            total += lengths[end]
+            end += 1
+        chunks.append(" ".join(sentences[start:end]))
+        if end == len(sentences):
+            break
+        # Step back over trailing sentences for overlap, always making progress
+        next_start, carried = end, 0
+        while next_start - 1 > start and carried + lengths[next_start - 1] <= overlap_tokens:
+            next_start -= 1
+            carried += lengths[next_start]
+        start = next_start
+    return chunks
+
+def _fan_in(chunk_tokens):
+    """How many chunk summaries fit in one reduce call, even at their maximum length."""
+    return max(2, chunk_tokens // CHUNK_GENERATE_KWARGS['max_length'])
+
+def _reduce_calls(map_calls, fan_in, max_levels):
+    """Generate calls per reduce level for `map_calls` chunk summaries."""
+    calls = []
+    remaining = map_calls
+    while remaining > fan_in and len(calls) < max_levels:
+        remaining = math.ceil(remaining / fan_in)
+        calls.append(remaining)
+    return calls
+
+@dataclass
+class SummaryPlan:
+    """The work call_summarization_model will do for one transcript.
+
+    `level_calls[0]` is the number of map calls (one per chunk); each later
+    entry is the number of generate calls at that reduce level. A reduce call
+    summarizes `fan_in` summaries, as many as fit in one chunk even at their
+    maximum length, so the plan is fixed before any generation runs.
+    `prefilter` holds the extractive pre-filter's stats when it was applied.
+    """
+    chunks: list
+    fan_in: int
+    level_calls: list = field(default_factory=list)
+    prefilter: dict = None
+
+    @property
+    def reduce_levels(self):
+        return len(self.level_calls) - 1
+
+    @property
+    def total_calls(self):
+        return sum(self.level_calls)
+
+    def to_dict(self):
+        plan = {
+            'chunks': len(self.chunks),
+            'fan_in': self.fan_in,
+            'reduce_levels': self.reduce_levels,
+            'level_calls': self.level_calls,
+            'total_calls': self.total_calls,
+        }
+        if self.prefilter:
+            plan['prefilter'] = self.prefilter
+        return plan
+
+def plan_summarization(lecture_transcript, chunk_tokens=None, overlap_tokens=None, max_levels=None, compression_ratio=None):
+    """Chunk a transcript and work out the map and reduce calls needed to summarize it.
+
+    Callers can use the plan's total_calls to estimate cost before starting,
+    then pass it to call_summarization_model to avoid chunking twice. A
+    `compression_ratio` below 1 (default SUMMARY_PREFILTER_RATIO) runs
+    prefilter_transcript first, so fewer chunks reach BART.
+    """
+    _, tokenizer = load_models()
+    chunk_tokens = chunk_tokens or CHUNK_TOKENS
+    max_levels = MAX_REDUCE_LEVELS if max_levels is None else max_levels
+    compression_ratio = PREFILTER_RATIO if compression_ratio is None else compression_ratio
+    stats = None
+    if compression_ratio < 1:
+        with stage('prefilter'):
+            lecture_transcript, stats = prefilter_transcript(lecture_transcript, tokenizer, compression_ratio, chunk_tokens)
+    chunks = chunk_by_tokens(lecture_transcript, tokenizer, chunk_tokens, overlap_tokens)
+    fan_in = _fan_in(chunk_tokens)
+    return SummaryPlan(chunks, fan_in, [len(chunks)] + _reduce_calls(len(chunks), fan_in, max_levels), stats)
+
+def _summarize_batch(texts, model, tokenizer, batch_size=None, max_batch_tokens=None, progress=None, level='map', **generate_kwargs):
+    """Summarize several texts in padded micro-batches, returning summaries in input order.
 
-    # If transcript is very long, split into chunks of ~800 words
-    words = lecture_transcript.split()
-    chunk_size = 800
-    if len(words) > chunk_size:
-        print(f"Transcript too long ({len(words)} words). Processing in chunks...")
-        summaries = []
-        for i in range(0, len(words), chunk_size):
-            chunk_text = " ".join(words[i:i + chunk_size])
-            inputs = tokenizer(chunk_text, return_tensors="pt", max_length=1024, truncation=True)
+    A micro-batch is flushed once it holds `batch_size` texts or once its padded
+    size (rows x longest input) would exceed `max_batch_tokens`. `progress`, if
+    given, is called as progress(done, total) after each micro-batch. `level`
+    labels the timing metrics ('map' or 'reduce<n>').
+    """
+    batch_size = batch_size or BATCH_SIZE
+    max_batch_tokens = max_batch_tokens or MAX_BATCH_TOKENS
+    if not texts:
+        return []
+
+    encoded = tokenizer(texts, max_length=MAX_INPUT_TOKENS, truncation=True)
+    lengths = [len(ids) for ids in encoded['input_ids']]
+    # Longest first, so each micro-batch pads to its first member and stays tight
+    order = sorted(range(len(texts)), key=lambda i: lengths[i], reverse=True)
+
+    summaries = [None] * len(texts)
+    batches = []
+    current = []
+    for i in order:
+        if current and (len(current) >= batch_size or lengths[current[0]] * (len(current) + 1) > max_batch_tokens):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+
+    for batch in batches:
+        features = [
+            {'input_ids': encoded['input_ids'][i], 'attention_mask': encoded['attention_mask'][i]}
+            for i in batch
+        ]
+        padded = tokenizer.pad(features, return_tensors="pt")
+        with stage('summarize', level=level), torch.no_grad():
             summary_ids = model.generate(
-                inputs['input_ids'], 
-                max_length=150, 
-                num_beams=1, # Greedy search is MUCH faster than beam search
-                no_repeat_ngram_size=3,
-                repetition_penalty=1.2,
-                early_stopping=True
+                padded['input_ids'],
+                attention_mask=padded['attention_mask'],
+                **generate_kwargs
             )
-            summaries.append(tokenizer.decode(summary_ids[0], skip_special_tokens=True))
-        
-        # Combine chunk summaries
-        final_text = " ".join(summaries)
-        # If the combined summary is still too long, summarize it one last time
-        if len(final_text.split()) > chunk_size:
-            return call_summarization_model(final_text)
-        return final_text
+        for i, text in zip(batch, tokenizer.batch_decode(summary_ids, skip_special_tokens=True)):
+            summaries[i] = text
+        if progress:
+            progress(sum(s is not None for s in summaries), len(texts))
+
+    return summaries
+
+def _reduce(summaries, plan, model, tokenizer, batch_size=None, max_batch_tokens=None, progress=None, done=0):
+    """Run the reduce levels of `plan` over the map summaries and join the result."""
+    for level, calls in enumerate(plan.level_calls[1:], start=1):
+        groups = [" ".join(summaries[i:i + plan.fan_in]) for i in range(0, len(summaries), plan.fan_in)]
+        print(f"Reduce level {level}: {len(summaries)} summaries in {calls} groups...")
+        summaries = _summarize_batch(
+            groups, model, tokenizer,
+            batch_size=batch_size,
+            max_batch_tokens=max_batch_tokens,
+            progress=progress and (lambda d, t, base=done: progress(base + d, plan.total_calls)),
+            level=f'reduce{level}',
+            **CHUNK_GENERATE_KWARGS
+        )
+        done += calls
+    return " ".join(summaries)
+
+def call_summarization_model(lecture_transcript, batch_size=None, max_batch_tokens=None, progress=None, plan=None, compression_ratio=None):
+    """Call the fine-tuned BART model to generate a summary with chunking for long text.
+
+    Text that fits in one chunk is summarized in a single call. Longer text
+    follows a SummaryPlan (see plan_summarization): every chunk is summarized
+    (map), then groups of summaries are summarized again for a bounded number
+    of reduce levels, and the final summaries are joined.
+
+    Calls are made in micro-batches; `batch_size` and `max_batch_tokens`
+    override the SUMMARY_BATCH_SIZE and SUMMARY_MAX_BATCH_TOKENS defaults, and a
+    batch size of 1 runs the chunks one at a time. `progress(done, total)` is
+    called as generate calls finish, with total = plan.total_calls.
+    `compression_ratio` is passed to plan_summarization when no plan is given.
+    """
+    model, tokenizer = load_models()
+    plan = plan or plan_summarization(lecture_transcript, compression_ratio=compression_ratio)
+
+    if len(plan.chunks) > 1:
+        print(f"Transcript too long ({len(plan.chunks)} chunks). Plan: {plan.to_dict()}")
+        summaries = _summarize_batch(
+            plan.chunks, model, tokenizer,
+            batch_size=batch_size,
+            max_batch_tokens=max_batch_tokens,
+            progress=progress and (lambda d, t: progress(d, plan.total_calls)),
+            **CHUNK_GENERATE_KWARGS
+        )
+        return _reduce(summaries, plan, model, tokenizer, batch_size, max_batch_tokens, progress, done=len(plan.chunks))
     else:
         # Standard processing for short/medium text
-        inputs = tokenizer(lecture_transcript, return_tensors="pt", max_length=1024, truncation=True)
-        summary_ids = model.generate(
-            inputs['input_ids'], 
-            max_length=500, 
-            num_beams=1, # Greedy search for speed
-            no_repeat_ngram_size=3,
-            repetition_penalty=1.2,
-            length_penalty=1.0, 
-            early_stopping=True
-        )
+        if plan.prefilter and plan.chunks:
+            lecture_transcript = plan.chunks[0]
+        inputs = tokenizer(lecture_transcript, return_tensors="pt", max_length=MAX_INPUT_TOKENS, truncation=True)
+        with stage('summarize', level='single'):
+            summary_ids = model.generate(inputs['input_ids'], **SINGLE_GENERATE_KWARGS)
         generated_summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
+        if progress:
+            progress(1, 1)
         print("Generated Summary Success")
-        return generated_summary
\ No newline at end of file
+        return generated_summary
+
+
+class IncrementalSummarizer:
+    """Summarizes a transcript while it is still being produced.
+
+    Text passed to feed() is cut into the same token chunks that
+    plan_summarization produces, and each chunk is summarized on a background
+    thread as soon as a following chunk has started (so it can no longer
+    grow). finish() summarizes the rest and runs the reduce levels, giving
+    the same result as call_summarization_model on the whole text.
+
+    Pass a shared `executor` to summarize chunks for several transcripts on
+    one pool; with a shared executor, finish() may be called repeatedly as
+    more text is fed, and only redoes the unfinished tail and the reduce.
+    """
+
+    def __init__(self, batch_size=None, max_batch_tokens=None, executor=None):
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self._pending = ""
+        self._futures = []
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='summarize')
+
+    @property
+    def chunks_queued(self):
+        return len(self._futures)
+
+    @property
+    def chunks_done(self):
+        return sum(1 for future in self._futures if future.done())
+
+    def _summarize_chunk(self, chunk_text, timings):
+        model, tokenizer = load_models()
+        # Runs on an executor thread: report stages to the feeding job's breakdown
+        with bind_timings(timings):
+            return _summarize_batch([chunk_text], model, tokenizer, **CHUNK_GENERATE_KWARGS)[0]
+
+    def feed(self, text):
+        """Append transcript text, queueing any chunks that are now complete."""
+        _, tokenizer = load_models()
+        self._pending = f"{self._pending} {text}".strip()
+        chunks = chunk_by_tokens(self._pending, tokenizer)
+        # Chunking is greedy, so every chunk but the last is final; the last
+        # one (which starts with its overlap) stays pending
+        timings = current_timings()
+        for chunk_text in chunks[:-1]:
+            self._futures.append(self._executor.submit(self._summarize_chunk, chunk_text, timings))
+        if len(chunks) > 1:
+            self._pending = chunks[-1]
+
+    def close(self):
+        """Drop queued chunks without summarizing them, e.g. when the transcript was abandoned.
+
+        Only this summarizer's chunks are cancelled, so closing it is safe on a
+        shared executor; a chunk already being summarized still finishes.
+        """
+        for future in self._futures:
+            future.cancel()
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    def finish(self):
+        """Wait for queued chunks and return the combined summary."""
+        try:
+            if not self._futures:
+                return call_summarization_model(self._pending, self.batch_size, self.max_batch_tokens)
+
+            model, tokenizer = load_models()
+            print(f"Summarized {len(self._futures)} chunks while transcribing, finishing the remainder...")
+            summaries = [future.result() for future in self._futures]
+            summaries += _summarize_batch(
+                chunk_by_tokens(self._pending, tokenizer), model, tokenizer,
+                batch_size=self.batch_size,
+                max_batch_tokens=self.max_batch_tokens,
+                **CHUNK_GENERATE_KWARGS
+            )
+            fan_in = _fan_in(CHUNK_TOKENS)
+            plan = SummaryPlan([], fan_in, [len(summaries)] + _reduce_calls(len(summaries), fan_in, MAX_REDUCE_LEVELS))
+            return _reduce(summaries, plan, model, tokenizer, self.batch_size, self.max_batch_tokens)
+        finally:
+            if self._owns_executor:
+                self._executor.shutdown(wait=False)
@@ -0,0 +1,75 @@
+from transformers import BartTokenizer, BartForConditionalGeneration
+import torch
+import os
+
+# Which backend load_models() uses: 'torch', 'torch-int8' or 'onnx'
+SUMMARIZER_BACKEND = os.environ.get('SUMMARIZER_BACKEND', 'torch')
+# Exported ONNX models are written here once and reused on later starts
+ONNX_EXPORT_DIR = os.environ.get('SUMMARIZER_ONNX_DIR', 'onnx_model')
+
+
+class SummarizerBackend:
+    """Loads a BART checkpoint as a (model, tokenizer) pair.
+
+    The returned model only needs to support `generate(input_ids,
+    attention_mask=..., **kwargs)`, so backends can swap in quantized or
+    non-PyTorch runtimes without touching the summarization code.
+    """
+    name = None
+
+    def load(self, model_name):
+        raise NotImplementedError
+
+
+class TorchBackend(SummarizerBackend):
+    """Full-precision PyTorch model, as loaded before backends existed."""
+    name = 'torch'
+
+    def load(self, model_name):
+        model = BartForConditionalGeneration.from_pretrained(model_name)
+        model.eval()
+        return model, BartTokenizer.from_pretrained(model_name)
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """PyTorch model with Linear layers dynamically quantized to int8 (roughly 1/4 the weight RAM)."""
+    name = 'torch-int8'
+
+    def load(self, model_name):
+        model, tokenizer = super().load(model_name)
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model, tokenizer
+
+
+class OnnxBackend(SummarizerBackend):
+    """ONNX Runtime encoder/decoder with KV cache, exported on first use.
+
+    Needs `optimum[onnxruntime]`, which is not installed by default.
+    """
+    name = 'onnx'
+
+    def load(self, model_name):
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError:
+            raise RuntimeError("SUMMARIZER_BACKEND=onnx requires 'optimum[onnxruntime]' to be installed")
+
+        export_path = os.path.join(ONNX_EXPORT_DIR, model_name.replace('/', '--'))
+        if os.path.exists(os.path.join(export_path, 'config.json')):
+            model = ORTModelForSeq2SeqLM.from_pretrained(export_path, use_cache=True)
+        else:
+            print(f"Exporting {model_name} to ONNX in {export_path}...")
+            model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True)
+            model.save_pretrained(export_path)
+        return model, BartTokenizer.from_pretrained(model_name)
+
+
+BACKENDS = {backend.name: backend for backend in (TorchBackend, QuantizedTorchBackend, OnnxBackend)}
+
+
+def get_backend(name=None):
+    """Instantiate the backend called `name` (default: SUMMARIZER_BACKEND)."""
+    name = name or SUMMARIZER_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown summarizer backend {name!r}, expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name]()
@@ -0,0 +1,115 @@
+import sys
+import os
+# Add the current directory to sys.path so we can import our modules
+sys.path.append(os.getcwd())
+
+import json
+import tempfile
+import threading
+
+import numpy as np
+
+from batch_ingest import load_checkpoint, run_batch
+
+LINKS = [
+    "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+    "https://youtu.be/aaaaaaaaaaa",  # same video as the first link
+    "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+    "https://www.youtube.com/watch?v=ccccccccccc",
+]
+
+
+def fake_download(failing=()):
+    """Offline stand-in for download_audio_array: one second of audio per lecture."""
+    def download(link):
+        if any(video_id in link for video_id in failing):
+            raise IOError("video unavailable")
+        return np.full(16000, len(link), dtype=np.float32)
+    return download
+
+
+def fake_transcribe(samples):
+    return f"lecture with {len(samples)} samples"
+
+
+def fake_summarize(text):
+    return f"summary of {text}"
+
+
+def read_records(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_processes_each_video_once_and_resumes():
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "results.jsonl")
+        processed, skipped = run_batch(LINKS, output, fake_download(failing=("ccccccccccc",)),
+                                       transcribe=fake_transcribe, summarize=fake_summarize)
+        assert (processed, skipped) == (3, 0)
+        records = {r['key']: r for r in read_records(output)}
+        assert records['aaaaaaaaaaa']['summary'] == "summary of lecture with 16000 samples"
+        assert records['ccccccccccc']['status'] == 'failed'
+        assert load_checkpoint(output) == {'aaaaaaaaaaa', 'bbbbbbbbbbb'}
+
+        # A rerun only retries the failed video
+        processed, skipped = run_batch(LINKS, output, fake_download(),
+                                       transcribe=fake_transcribe, summarize=fake_summarize)
+        assert (processed, skipped) == (1, 2)
+        assert load_checkpoint(output) == {'aaaaaaaaaaa', 'bbbbbbbbbbb', 'ccccccccccc'}
+
+
+def test_spills_audio_beyond_memory_budget():
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "results.jsonl")
+        seen = []
+        release = threading.Event()
+
+        def slow_transcribe(samples):
+            # Hold up transcription so later downloads queue behind it
+            release.wait(5)
+            seen.append(samples)
+            return fake_transcribe(samples)
+
+        spill_dir = os.path.join(tmp, "spill")
+        os.mkdir(spill_dir)
+        threading.Timer(0.5, release.set).start()
+        default_tempdir, tempfile.tempdir = tempfile.tempdir, spill_dir
+        try:
+            processed, _ = run_batch(LINKS, output, fake_download(), download_workers=3, max_buffered_mb=0,
+                                     transcribe=slow_transcribe, summarize=fake_summarize)
+        finally:
+            tempfile.tempdir = default_tempdir
+        assert processed == 3
+        # Spilled lectures come back intact, and their temporary files are gone
+        assert sorted(int(s[0]) for s in seen) == sorted(len(link) for link in (LINKS[0], LINKS[2], LINKS[3]))
+        assert all(r['status'] == 'done' for r in read_records(output))
+        assert os.listdir(spill_dir) == []
+
+
+def test_summarize_overlaps_next_transcription():
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "results.jsonl")
+        summarizing = threading.Event()
+        overlapped = []
+
+        def transcribe(samples):
+            overlapped.append(summarizing.is_set())
+            return fake_transcribe(samples)
+
+        def summarize(text):
+            summarizing.set()
+            # Give the transcription stage time to start on the next lecture
+            threading.Event().wait(0.2)
+            summarizing.clear()
+            return fake_summarize(text)
+
+        run_batch(LINKS, output, fake_download(), download_workers=1, transcribe=transcribe, summarize=summarize)
+        assert any(overlapped)
+
+
+if __name__ == "__main__":
+    test_processes_each_video_once_and_resumes()
+    test_spills_audio_beyond_memory_budget()
+    test_summarize_overlaps_next_transcription()
+    print("batch_ingest checks passed")
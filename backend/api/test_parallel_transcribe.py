@@ -0,0 +1,57 @@
+import sys
+import os
+# Add the current directory to sys.path so we can import our modules
+sys.path.append(os.getcwd())
+
+import numpy as np
+
+import parallel_transcribe
+from parallel_transcribe import SAMPLE_RATE, find_silence_splits, transcribe_parallel
+
+
+class StubWhisper:
+    """Stands in for Whisper on synthetic audio whose samples hold their own timestamp.
+
+    The "lecture" says word w<t> from t to t + 0.5 s for every whole second t;
+    words cut by a piece edge come out garbled, as Whisper mishears them.
+    """
+
+    def transcribe(self, samples, word_timestamps=False):
+        offset = round(float(samples[0]) * SAMPLE_RATE) / SAMPLE_RATE
+        end = offset + len(samples) / SAMPLE_RATE
+        words = []
+        for t in range(int(np.floor(offset)), int(end) + 1):
+            start, stop = max(t, offset), min(t + 0.5, end)
+            if stop > start:
+                cut = start > t or stop < t + 0.5
+                words.append({'start': start - offset, 'end': stop - offset, 'word': f" {'x' if cut else 'w'}{t}"})
+        segment = {'start': words[0]['start'], 'end': words[-1]['end'], 'text': "".join(w['word'] for w in words)}
+        if word_timestamps:
+            segment['words'] = words
+        return {'segments': [segment], 'text': segment['text']}
+
+
+def test_cuts_without_a_pause_keep_every_word_once():
+    parallel_transcribe._local_model = lambda: StubWhisper()
+    # Continuous "speech" (the recording starts 100 s in): no frame is quiet
+    # enough to be a pause, and a cut every ~10 s lands inside words
+    samples = (100 + np.arange(95 * SAMPLE_RATE) / SAMPLE_RATE).astype(np.float32)
+    assert not any(pause for _, pause in find_silence_splits(samples, segment_seconds=10))
+    result = transcribe_parallel(samples, workers=1, segment_seconds=10)
+    assert result['text'].split() == [f"w{t}" for t in range(100, 195)]
+    assert all(a['end'] <= b['start'] for a, b in zip(result['segments'], result['segments'][1:]))
+
+
+def test_pauses_are_detected():
+    rng = np.random.default_rng(0)
+    samples = rng.uniform(-0.5, 0.5, 30 * SAMPLE_RATE).astype(np.float32)
+    samples[9 * SAMPLE_RATE:int(9.5 * SAMPLE_RATE)] = 0
+    splits = find_silence_splits(samples, segment_seconds=10, search_seconds=2)
+    assert splits[0][1] and 9 * SAMPLE_RATE <= splits[0][0] < 9.5 * SAMPLE_RATE
+    assert not splits[1][1]
+
+
+if __name__ == "__main__":
+    test_cuts_without_a_pause_keep_every_word_once()
+    test_pauses_are_detected()
+    print("parallel_transcribe checks passed")
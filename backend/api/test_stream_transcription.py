@@ -0,0 +1,76 @@
+import sys
+import os
+# Add the current directory to sys.path so we can import our modules
+sys.path.append(os.getcwd())
+
+import numpy as np
+
+import transcribe
+from transcribe import SAMPLE_RATE, stream_transcription
+
+
+class StubWhisper:
+    """Stands in for Whisper on synthetic audio whose samples hold their own timestamp.
+
+    The "lecture" says word w<t> from t to t + 0.5 s for every whole second t.
+    Words cut by a window edge are not recognized, and the rest are grouped
+    into segments of `segment_seconds`, like Whisper's ~30 s segments.
+    """
+
+    def __init__(self, segment_seconds, words=True):
+        self.segment_seconds = segment_seconds
+        self.words = words
+
+    def transcribe(self, samples, initial_prompt=None, word_timestamps=False):
+        offset = round(float(samples[0]) * SAMPLE_RATE) / SAMPLE_RATE
+        end = offset + len(samples) / SAMPLE_RATE
+        segments = {}
+        for t in range(int(np.ceil(offset)), int(end) + 1):
+            if t + 0.5 <= end:
+                segments.setdefault(int((t - offset) // self.segment_seconds), []).append(t)
+        result = []
+        for times in segments.values():
+            segment = {
+                'start': times[0] - offset,
+                'end': times[-1] + 0.5 - offset,
+                'text': " ".join(f"w{t}" for t in times),
+            }
+            if word_timestamps and self.words:
+                segment['words'] = [{'start': t - offset, 'end': t + 0.5 - offset, 'word': f" w{t}"} for t in times]
+            result.append(segment)
+        return {'segments': result, 'text': " ".join(s['text'] for s in result)}
+
+
+def run(seconds, segment_seconds, words, window_seconds=120, overlap_seconds=4):
+    transcribe._load_whisper = lambda: StubWhisper(segment_seconds, words)
+    samples = (np.arange(seconds * SAMPLE_RATE) / SAMPLE_RATE).astype(np.float32)
+    return list(stream_transcription(samples, window_seconds, overlap_seconds))
+
+
+def test_every_word_emitted_once():
+    for segment_seconds in (9, 25, 30):
+        for words in (True, False):
+            segments = run(600, segment_seconds, words)
+            spoken = " ".join(s['text'] for s in segments).split()
+            assert spoken == [f"w{t}" for t in range(600)], (segment_seconds, words)
+            assert all(a['end'] <= b['start'] for a, b in zip(segments, segments[1:]))
+
+
+def test_last_window_emitted():
+    for seconds in (600, 601, 250):
+        segments = run(seconds, 25, words=False)
+        assert segments[-1]['text'].split()[-1] == f"w{seconds - 1}"
+        assert segments[-1]['end'] == seconds - 0.5
+
+
+def test_window_long_segment_not_skipped():
+    # A single segment filling the whole window cannot be held back without stalling
+    segments = run(200, 1000, words=False)
+    assert " ".join(s['text'] for s in segments).split() == [f"w{t}" for t in range(200)]
+
+
+if __name__ == "__main__":
+    test_every_word_emitted_once()
+    test_last_window_emitted()
+    test_window_long_segment_not_skipped()
+    print("stream_transcription regression checks passed")
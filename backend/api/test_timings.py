@@ -0,0 +1,67 @@
+import sys
+import os
+# Add the current directory to sys.path so we can import our modules
+sys.path.append(os.getcwd())
+
+import summarization_model
+from metrics import collect_timings, stage
+from summarization_model import IncrementalSummarizer
+from transcript_providers import Transcript, TranscriptProvider, TranscriptService
+
+
+class DictCache:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+
+class TimedProvider(TranscriptProvider):
+    """Offline provider whose fetch times a nested stage, like the Whisper download."""
+    name = 'timed'
+    timeout = 5
+
+    def fetch(self, video_id, video_url, cancel, on_segment=None):
+        with stage('audio_download'):
+            pass
+        return Transcript([{'start': 0.0, 'end': 1.0, 'text': "hello"}], self.name, "en")
+
+
+def test_provider_stages_reach_the_job():
+    service = TranscriptService(DictCache(), chain=[TimedProvider()])
+    with collect_timings() as timings:
+        assert service.get('aaaaaaaaaaa', 'https://youtu.be/aaaaaaaaaaa').provider == 'timed'
+    assert [t['stage'] for t in timings] == ['audio_download', 'transcript_fetch']
+    assert timings[1]['provider'] == 'timed'
+
+
+def test_chunk_summaries_reach_the_job():
+    def fake_batch(texts, model, tokenizer, **kwargs):
+        with stage('summarize', level='chunk'):
+            return [text.upper() for text in texts]
+
+    originals = (summarization_model.load_models, summarization_model.chunk_by_tokens,
+                 summarization_model._summarize_batch)
+    summarization_model.load_models = lambda: (None, None)
+    summarization_model.chunk_by_tokens = lambda text, tokenizer: text.split("|")
+    summarization_model._summarize_batch = fake_batch
+    try:
+        summarizer = IncrementalSummarizer()
+        with collect_timings() as timings:
+            summarizer.feed("one|two|three")
+            assert [f.result() for f in summarizer._futures] == ["ONE", "TWO"]
+        summarizer.close()
+    finally:
+        (summarization_model.load_models, summarization_model.chunk_by_tokens,
+         summarization_model._summarize_batch) = originals
+    assert [(t['stage'], t['level']) for t in timings] == [('summarize', 'chunk')] * 2
+
+
+if __name__ == "__main__":
+    test_provider_stages_reach_the_job()
+    test_chunk_summaries_reach_the_job()
+    print("timing propagation checks passed")
@@ -1,20 +1,188 @@
 import whisper
+import numpy as np
+import subprocess
+import threading
+import time
 import os
 
+from metrics import stage
+from parallel_transcribe import TRANSCRIBE_WORKERS, iter_parallel_segments, transcribe_parallel
+
 # Global model to avoid reloading on every request
 _whisper_model = None
+_whisper_load_seconds = None
+_whisper_lock = threading.Lock()
+
+# Streaming mode decodes audio in windows of WINDOW_SECONDS that overlap by
+# OVERLAP_SECONDS, so peak memory depends on the window, not the lecture length
+SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+WINDOW_SECONDS = int(os.environ.get('TRANSCRIBE_WINDOW_SECONDS', 120))
+OVERLAP_SECONDS = int(os.environ.get('TRANSCRIBE_OVERLAP_SECONDS', 4))
+
+def _load_whisper():
+    global _whisper_model, _whisper_load_seconds
+    with _whisper_lock:
+        if _whisper_model is None:
+            print("Loading Whisper 'tiny' model for the first time...")
+            start = time.perf_counter()
+            _whisper_model = whisper.load_model("tiny")
+            _whisper_load_seconds = time.perf_counter() - start
+    return _whisper_model
+
+def whisper_status():
+    """Load state of the Whisper model, for the readiness endpoint."""
+    return {'loaded': _whisper_model is not None, 'name': 'tiny', 'load_seconds': _whisper_load_seconds}
 
 def transcribe_lecture(audio):
-    """Transcribes an audio file into text."""
-    global _whisper_model
-    if _whisper_model is None:
-        print("Loading Whisper 'tiny' model for the first time...")
-        _whisper_model = whisper.load_model("tiny")
-    
-    result = _whisper_model.transcribe(audio)
+    """Transcribes an audio file, or 16 kHz float32 samples (see download_audio_array), into text.
+
+    With TRANSCRIBE_WORKERS > 1 the audio is split at silences and spread
+    over a process pool (see parallel_transcribe.py).
+    """
+    if TRANSCRIBE_WORKERS > 1:
+        result = transcribe_parallel(audio)
+    else:
+        model = _load_whisper()
+        with stage('transcribe'):
+            result = model.transcribe(audio)
 
     # Delete the temporary audio file
-    if os.path.exists(audio):
+    if isinstance(audio, str) and os.path.exists(audio):
         os.remove(audio)
     
-    return result["text"]
\ No newline at end of file
+    return result["text"]
+
+class _AudioSource:
+    """16 kHz mono float32 audio read window by window, with window starts never moving backwards.
+
+    Arrays are sliced; file paths are decoded incrementally through an ffmpeg
+    pipe, keeping only the current window in memory.
+    """
+
+    def __init__(self, audio):
+        self._array = audio if isinstance(audio, np.ndarray) else None
+        self._path = audio
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0
+        self._remainder = b""
+        self._eof = False
+        self._process = None
+        if self._array is None:
+            cmd = [
+                "ffmpeg", "-nostdin", "-threads", "0", "-i", audio,
+                "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-"
+            ]
+            self._process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def read(self, start, count):
+        """Return (samples, is_last) for samples [start, start + count)."""
+        if self._array is not None:
+            return self._array[start:start + count], start + count >= len(self._array)
+
+        self._buffer = self._buffer[start - self._buffer_start:]
+        self._buffer_start = start
+        # One sample of lookahead tells whether this window is the last one
+        while len(self._buffer) <= count and not self._eof:
+            raw = self._process.stdout.read((count + 1 - len(self._buffer)) * 2)
+            if not raw:
+                self._eof = True
+                if self._process.wait() != 0 and self._buffer_start == 0 and not len(self._buffer):
+                    raise RuntimeError(f"ffmpeg failed to decode {self._path}")
+                break
+            raw = self._remainder + raw
+            usable = len(raw) - len(raw) % 2
+            self._remainder = raw[usable:]
+            samples = np.frombuffer(raw[:usable], np.int16).astype(np.float32) / 32768.0
+            self._buffer = np.concatenate([self._buffer, samples])
+        return self._buffer[:count], len(self._buffer) <= count
+
+    def close(self):
+        if self._process is None:
+            return
+        self._process.stdout.close()
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+
+def _segment_words(segment):
+    """Words of a Whisper segment as (start, end, text), relative to its window.
+
+    Without word timestamps the whole segment counts as one word.
+    """
+    if segment.get("words"):
+        return [(w["start"], w["end"], w["word"]) for w in segment["words"]]
+    return [(segment["start"], segment["end"], " " + segment["text"].strip())]
+
+def stream_transcription(audio, window_seconds=WINDOW_SECONDS, overlap_seconds=OVERLAP_SECONDS):
+    """Transcribe audio window by window, yielding segments as soon as they are decoded.
+
+    Each segment is a dict with absolute `start`/`end` times in seconds and its
+    `text`. Only words that end before the last `overlap_seconds` of a window
+    are emitted; the next window starts `overlap_seconds` before the first
+    word that was held back, and skips words whose midpoint falls before it.
+    Words at a window boundary are therefore decoded whole in one window and
+    emitted exactly once. Without word timestamps whole segments are held
+    back, and the next window starts exactly where the held-back one began.
+    """
+    model = _load_whisper()
+    window_samples = window_seconds * SAMPLE_RATE
+    overlap = float(overlap_seconds)
+
+    source = _AudioSource(audio)
+    position = 0.0  # everything before this has been emitted
+    emitted_end = 0.0
+    previous_text = ""
+    has_words = True
+    try:
+        while True:
+            # Whole segments cannot be trimmed, so without word timestamps resume exactly at `position`
+            offset = max(0.0, position - overlap) if has_words else position
+            start_sample = int(round(offset * SAMPLE_RATE))
+            offset = start_sample / SAMPLE_RATE
+            samples, is_last = source.read(start_sample, window_samples)
+            if not len(samples):
+                return
+            cutoff = offset + len(samples) / SAMPLE_RATE - (0 if is_last else overlap)
+            with stage('transcribe', mode='stream'):
+                result = model.transcribe(samples, initial_prompt=previous_text or None, word_timestamps=True)
+
+            held_back = None
+            has_words = all(segment.get("words") for segment in result["segments"])
+            for segment in result["segments"]:
+                words = [
+                    (offset + w_start, offset + w_end, text)
+                    for w_start, w_end, text in _segment_words(segment)
+                    if offset + (w_start + w_end) / 2 >= position
+                ]
+                ready = []
+                for word in words:
+                    # Holding back a word that starts at `position` would make no progress
+                    if word[1] > cutoff and word[0] > position:
+                        held_back = word[0]
+                        break
+                    ready.append(word)
+                if ready:
+                    text = "".join(w[2] for w in ready).strip()
+                    previous_text = text
+                    emitted_end = ready[-1][1]
+                    yield {'start': ready[0][0], 'end': emitted_end, 'text': text}
+                if held_back is not None:
+                    break
+
+            if is_last:
+                return
+            # Resume at the first held-back word, or after this window if nothing was held back
+            next_position = max(cutoff, emitted_end) if held_back is None else min(max(held_back, position), cutoff)
+            position = next_position if next_position > position else max(cutoff, emitted_end)
+    finally:
+        source.close()
+
+def transcribe_segments(audio):
+    """Yield timestamped segments as they are transcribed.
+
+    Uses the process pool when TRANSCRIBE_WORKERS > 1, otherwise
+    stream_transcription's overlapping windows in this process.
+    """
+    if TRANSCRIBE_WORKERS > 1:
+        return iter_parallel_segments(audio)
+    return stream_transcription(audio)
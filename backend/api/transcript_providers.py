@@ -0,0 +1,227 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound, TranscriptsDisabled
+
+from cache import make_key
+from generate_audio import download_audio_array
+from metrics import bind_timings, current_timings, stage
+from transcribe import transcribe_segments
+
+# Preferred caption languages, most preferred first
+TRANSCRIPT_LANGUAGES = os.environ.get('TRANSCRIPT_LANGUAGES', 'en,en-US,en-GB').split(',')
+CAPTIONS_TIMEOUT = int(os.environ.get('CAPTIONS_TIMEOUT', 20))
+WHISPER_FALLBACK_TIMEOUT = int(os.environ.get('WHISPER_FALLBACK_TIMEOUT', 1800))
+WHISPER_FALLBACK = os.environ.get('WHISPER_FALLBACK', '1') == '1'
+# How long a "this video has no captions" result is trusted before captions are tried again
+NO_CAPTIONS_TTL = int(os.environ.get('NO_CAPTIONS_TTL', 24 * 3600))
+
+
+class TranscriptUnavailable(Exception):
+    """The provider definitely has no transcript for this video (as opposed to a transient error)."""
+
+
+class FetchCancelled(Exception):
+    """A provider stopped early because its result is no longer wanted."""
+
+
+class Transcript:
+    """Timed transcript segments plus where they came from."""
+
+    def __init__(self, segments, provider, language=None):
+        self.segments = segments
+        self.provider = provider
+        self.language = language
+
+    @property
+    def text(self):
+        return " ".join(segment['text'] for segment in self.segments)
+
+    def to_dict(self):
+        return {'segments': self.segments, 'provider': self.provider, 'language': self.language}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['segments'], data['provider'], data.get('language'))
+
+
+def _caption_segments(fetched):
+    # youtube-transcript-api < 1.0 returns dicts, later versions snippet objects
+    raw = fetched.to_raw_data() if hasattr(fetched, 'to_raw_data') else fetched
+    return [
+        {'start': item['start'], 'end': item['start'] + item.get('duration', 0), 'text': item['text']}
+        for item in raw
+    ]
+
+
+def _list_transcripts(video_id):
+    # youtube-transcript-api 1.0 moved listing to an instance method; the
+    # static list_transcripts was deprecated then and removed in 1.2
+    api = YouTubeTranscriptApi()
+    if hasattr(api, 'list'):
+        return api.list(video_id)
+    return YouTubeTranscriptApi.list_transcripts(video_id)
+
+
+class TranscriptProvider:
+    """One way of getting a transcript; fetch() returns a Transcript or raises.
+
+    `cancel` is a threading.Event set once the result is no longer wanted
+    (the provider timed out); long-running providers should
+    check it and raise FetchCancelled. `on_segment`, if given, is called with
+    each segment as soon as it is available.
+    """
+    name = None
+    timeout = None
+    # Captions-based providers take part in the negative cache
+    captions = False
+
+    def fetch(self, video_id, video_url, cancel, on_segment=None):
+        raise NotImplementedError
+
+
+class CaptionsProvider(TranscriptProvider):
+    """YouTube captions in a preferred language: manual, else auto-generated, else translated.
+
+    The video's caption tracks are listed once per fetch, and the candidates
+    are tried in that order, so a failed download of one track falls back to
+    the next without another listing request.
+    """
+    name = 'captions'
+    timeout = CAPTIONS_TIMEOUT
+    captions = True
+
+    def _candidates(self, transcripts):
+        for find in (transcripts.find_manually_created_transcript, transcripts.find_generated_transcript):
+            try:
+                yield find(TRANSCRIPT_LANGUAGES)
+            except NoTranscriptFound:
+                pass
+        for transcript in transcripts:
+            if transcript.is_translatable:
+                yield transcript.translate(TRANSCRIPT_LANGUAGES[0].split('-')[0])
+                return
+
+    def fetch(self, video_id, video_url, cancel, on_segment=None):
+        try:
+            transcripts = _list_transcripts(video_id)
+        except TranscriptsDisabled as e:
+            raise TranscriptUnavailable(str(e))
+        error = None
+        for transcript in self._candidates(transcripts):
+            if cancel.is_set():
+                raise FetchCancelled(self.name)
+            try:
+                segments = _caption_segments(transcript.fetch())
+            except Exception as e:
+                error = e
+                continue
+            provider = 'auto-captions' if transcript.is_generated else self.name
+            return Transcript(segments, provider, transcript.language_code)
+        if error is not None:
+            raise error
+        raise TranscriptUnavailable(f"No captions in {', '.join(TRANSCRIPT_LANGUAGES)} for {video_id}")
+
+
+class WhisperProvider(TranscriptProvider):
+    """Download the audio and transcribe it locally; slow, but works without captions."""
+    name = 'whisper'
+    timeout = WHISPER_FALLBACK_TIMEOUT
+
+    def fetch(self, video_id, video_url, cancel, on_segment=None):
+        samples = download_audio_array(video_url)
+        segments = []
+        for segment in transcribe_segments(samples):
+            # Checked once per decoded segment, so a timed-out run stops within one window
+            if cancel.is_set():
+                raise FetchCancelled(self.name)
+            segments.append({'start': segment['start'], 'end': segment['end'], 'text': segment['text']})
+            if on_segment:
+                on_segment(segment)
+        if not segments:
+            raise TranscriptUnavailable("Whisper produced no speech")
+        return Transcript(segments, self.name)
+
+
+def default_chain():
+    """YouTube captions first, then the Whisper fallback."""
+    chain = [CaptionsProvider()]
+    if WHISPER_FALLBACK:
+        chain.append(WhisperProvider())
+    return chain
+
+
+class TranscriptService:
+    """Gets transcripts by trying a chain of providers in order, with caching.
+
+    Each fetch runs on a worker thread only so its timeout can be enforced:
+    a provider that fails or times out is told to stop through its cancel
+    event, and the next one is tried. Transcripts (with segment timings) are
+    cached by video ID, and videos whose caption providers all report "no
+    transcript" are remembered for NO_CAPTIONS_TTL so later requests go
+    straight to Whisper.
+    """
+
+    def __init__(self, cache, chain=None, max_workers=4):
+        self.cache = cache
+        self.chain = chain or default_chain()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='transcript')
+
+    def _no_captions(self, video_id):
+        marker = self.cache.get(make_key('no-captions', video_id))
+        return marker is not None and marker['until'] > time.time()
+
+    def _fetch(self, provider, video_id, video_url, on_segment=None):
+        """Run one provider, returning its Transcript or raising once it fails or times out."""
+        cancel = threading.Event()
+        future = self._executor.submit(
+            self._timed_fetch, current_timings(), provider, video_id, video_url, cancel, on_segment)
+        try:
+            return future.result(timeout=provider.timeout)
+        except FutureTimeout:
+            raise TimeoutError(f"{provider.name} timed out after {provider.timeout}s")
+        finally:
+            # Stops a timed-out provider at its next check, so it does not keep a thread busy
+            cancel.set()
+            future.cancel()
+
+    def _timed_fetch(self, timings, provider, video_id, video_url, cancel, on_segment):
+        # Runs on an executor thread: report stages to the caller's breakdown
+        with bind_timings(timings), stage('transcript_fetch', provider=provider.name):
+            return provider.fetch(video_id, video_url, cancel, on_segment)
+
+    def get(self, video_id, video_url, on_stage=None, on_segment=None):
+        """Return a Transcript for the video, or None if every provider failed.
+
+        `on_stage(name)` is called before each provider runs ('fetch' for
+        captions, 'transcribe' for Whisper), e.g. to report job progress.
+        `on_segment(segment)` receives segments from providers that produce
+        them incrementally (Whisper), e.g. to start summarizing early.
+        """
+        cache_key = make_key('transcript-segments', video_id)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return Transcript.from_dict(cached)
+
+        skip_captions = self._no_captions(video_id)
+        caption_providers = sum(1 for p in self.chain if p.captions)
+        no_captions = 0
+        for provider in self.chain:
+            if skip_captions and provider.captions:
+                continue
+            if on_stage:
+                on_stage('transcribe' if isinstance(provider, WhisperProvider) else 'fetch')
+            try:
+                transcript = self._fetch(provider, video_id, video_url, on_segment)
+            except Exception as e:
+                print(f"Transcript provider {provider.name} failed for {video_id}: {e}")
+                if provider.captions and isinstance(e, TranscriptUnavailable):
+                    no_captions += 1
+                    if no_captions == caption_providers:
+                        self.cache.set(make_key('no-captions', video_id), {'until': time.time() + NO_CAPTIONS_TTL})
+                continue
+            self.cache.set(cache_key, transcript.to_dict())
+            return transcript
+        return None
@@ -224,6 +224,29 @@ const generateQuizFromText = (text) => {
 };
 
 
+// Poll a background summary job until it finishes, reporting stage progress
+const waitForJob = async (jobId, onProgress) => {
+  while (true) {
+    const { data } = await axios.get(`/api/jobs/${jobId}`);
+    if (data.status === 'done') return data.result;
+    if (data.status === 'failed') throw new Error(data.error || 'Summary failed');
+    if (onProgress && data.progress) onProgress(data.progress);
+    await new Promise(resolve => setTimeout(resolve, 2000));
+  }
+};
+
+const describeProgress = (progress) => {
+  if (progress.stage === 'summarize' && progress.total) {
+    return `🧠 Summarizing part ${progress.done} of ${progress.total}...`;
+  }
+  if (progress.stage === 'fetch') return "📥 Fetching the lecture transcript...";
+  if (progress.stage === 'transcribe' && progress.seconds) {
+    return `🎙️ No captions found, transcribing the audio (${Math.floor(progress.seconds / 60)} min so far)...`;
+  }
+  if (progress.stage === 'transcribe') return "🎙️ No captions found, transcribing the audio...";
+  return "🧠 AI is generating your Smart Notes...";
+};
+
 const Summarization = () => {
   const [link, setLink] = useState('');
   const [summarization, setSummarization] = useState('');
@@ -288,7 +311,10 @@ const Summarization = () => {
       setStatusMessage("🧠 AI is generating your Smart Notes...");
       const endpoint = '/api/link-summary';
       const response = await axios.post(endpoint, { link });
-      const fullText = response.data.summary;
+      const result = response.data.job_id
+        ? await waitForJob(response.data.job_id, (progress) => setStatusMessage(describeProgress(progress)))
+        : response.data;
+      const fullText = result.summary;
       setSummarization(fullText);
       setCopied(false);
       setStatusMessage("✅ Notes processed!");
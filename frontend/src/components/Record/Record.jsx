@@ -163,6 +163,29 @@ const MermaidDiagram = ({ chart }) => {
   return <div key={chart} ref={ref} className="mermaid-container animate-pop"></div>;
 };
 
+// Poll a background summary job until it finishes, reporting stage progress
+const waitForJob = async (jobId, onProgress) => {
+  while (true) {
+    const { data } = await axios.get(`/api/jobs/${jobId}`);
+    if (data.status === 'done') return data.result;
+    if (data.status === 'failed') throw new Error(data.error || 'Summary failed');
+    if (onProgress && data.progress) onProgress(data.progress);
+    await new Promise(resolve => setTimeout(resolve, 2000));
+  }
+};
+
+const describeProgress = (progress) => {
+  if (progress.stage === 'summarize' && progress.total) {
+    return `🧠 Summarizing part ${progress.done} of ${progress.total}...`;
+  }
+  if (progress.stage === 'fetch') return "📥 Fetching the lecture transcript...";
+  if (progress.stage === 'transcribe' && progress.seconds) {
+    return `🎙️ No captions found, transcribing the audio (${Math.floor(progress.seconds / 60)} min so far)...`;
+  }
+  if (progress.stage === 'transcribe') return "🎙️ No captions found, transcribing the audio...";
+  return "🧠 AI is generating your Smart Notes...";
+};
+
 const Record = () => {
   const [isRecording, setIsRecording] = useState(false);
   const [loading, setLoading] = useState(false);
@@ -175,6 +198,10 @@ const Record = () => {
   const [statusMessage, setStatusMessage] = useState("");
   const [realTimeFlashcards, setRealTimeFlashcards] = useState([]);
   const [accumulatedTranscript, setAccumulatedTranscript] = useState("");
+  // Live session on the server: transcript deltas are summarized while recording.
+  // Holds { id, failed }; id is filled in once the session has been created.
+  const sessionRef = useRef(null);
+  const appendChainRef = useRef(Promise.resolve());
   const [viewMode, setViewMode] = useState("full");
   const [recentSummaries, setRecentSummaries] = useState(() => {
     const saved = sessionStorage.getItem('smart_notes_recents');
@@ -225,10 +252,47 @@ const Record = () => {
   useEffect(() => {
     if (finalTranscript) {
       setAccumulatedTranscript(prev => prev + " " + finalTranscript);
+      const session = sessionRef.current;
+      if (session) {
+        // Appends are chained behind session creation so the server receives every delta in order;
+        // a failed append marks the session so finalizing falls back to the full summary
+        const delta = finalTranscript;
+        appendChainRef.current = appendChainRef.current
+          .then(() => {
+            if (session.id && !session.failed) {
+              return axios.post(`/api/record-sessions/${session.id}/append`, { delta });
+            }
+            session.failed = true;
+          })
+          .catch(() => { session.failed = true; });
+      }
       resetTranscript();
     }
   }, [finalTranscript, resetTranscript]);
 
+  // Frees the server-side session once pending appends have been sent
+  const closeSession = () => {
+    const session = sessionRef.current;
+    sessionRef.current = null;
+    if (!session) return;
+    appendChainRef.current = appendChainRef.current
+      .then(() => session.id && axios.delete(`/api/record-sessions/${session.id}`))
+      .catch(() => {});
+  };
+
+  const startSession = () => {
+    closeSession();
+    const session = { id: null, failed: false };
+    sessionRef.current = session;
+    appendChainRef.current = appendChainRef.current
+      .then(() => axios.post('/api/record-sessions'))
+      .then((response) => { session.id = response.data.session_id; })
+      .catch(() => { session.failed = true; });
+  };
+
+  // Close the open session when leaving the page
+  useEffect(() => () => closeSession(), []);
+
   const fullLiveTranscript = (accumulatedTranscript + " " + transcript).trim();
 
   const keywords = [
@@ -292,6 +356,7 @@ const Record = () => {
       resetTranscript();
       setSummarization("");
       setRealTimeFlashcards([]);
+      startSession();
       SpeechRecognition.startListening({ continuous: true, language: 'en-GB' });
     }
     setIsRecording(!isRecording);
@@ -323,9 +388,30 @@ const Record = () => {
       setShowQuiz(false);
       setQuizQuestions([]);
       setStatusMessage("🧠 AI is processing your live notes...");
-      const endpoint = '/api/record-summary';
-      const response = await axios.post(endpoint, { finalTranscript: fullLiveTranscript });
-      const fullText = response.data.summary;
+      let fullText = null;
+      await appendChainRef.current;
+      const session = sessionRef.current;
+      if (session && session.id && !session.failed) {
+        // Most of the transcript was summarized while recording; only the tail is left
+        try {
+          const response = await axios.post(`/api/record-sessions/${session.id}/finalize`, { delta: transcript });
+          const result = response.data.job_id
+            ? await waitForJob(response.data.job_id, (progress) => setStatusMessage(describeProgress(progress)))
+            : response.data;
+          fullText = result.summary;
+        } catch (error) {
+          fullText = null;
+        }
+        closeSession();
+      }
+      if (fullText === null) {
+        const endpoint = '/api/record-summary';
+        const response = await axios.post(endpoint, { finalTranscript: fullLiveTranscript });
+        const result = response.data.job_id
+          ? await waitForJob(response.data.job_id, (progress) => setStatusMessage(describeProgress(progress)))
+          : response.data;
+        fullText = result.summary;
+      }
 
       setSummarization(fullText);
       setCopied(false);
@@ -519,7 +605,7 @@ const Record = () => {
         <div className="controls">
           <div className="btn-group">
             <button className={`control-btn ${isRecording ? 'active' : ''}`} onClick={toggleRecording}><FontAwesomeIcon icon={isRecording ? faStop : faPlay} /></button>
-            <button className="control-btn secondary" onClick={() => { setAccumulatedTranscript(""); resetTranscript(); setSummarization(""); setStatusMessage(""); setRealTimeFlashcards([]); }}><FontAwesomeIcon icon={faUndo} /></button>
+            <button className="control-btn secondary" onClick={() => { setAccumulatedTranscript(""); resetTranscript(); closeSession(); setSummarization(""); setStatusMessage(""); setRealTimeFlashcards([]); }}><FontAwesomeIcon icon={faUndo} /></button>
           </div>
         </div>
 